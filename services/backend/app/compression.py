@@ -0,0 +1,96 @@
+"""
+Response compression negotiated from the Accept-Encoding header.
+"""
+import os
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from .fetchers.common.compression import Compressor, compress, negotiate_encoding
+
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies with zstd, brotli or gzip.
+
+    Bodies smaller than `minimum_size` are sent as they are. Streaming
+    responses are compressed chunk by chunk, every chunk being flushed so that
+    it reaches the client at once. Compression runs in the thread pool so it
+    does not block the event loop.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app, encoding, minimum_size):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.is_passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.is_passthrough = "Content-Encoding" in headers
+            return
+        if message["type"] != "http.response.body" or self.is_passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = await run_in_threadpool(compress, body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+            self.start_message = None
+            self.compressor = Compressor(self.encoding)
+        if more_body:
+            body = await run_in_threadpool(self.compressor.compress_chunk, body)
+        else:
+            body = await run_in_threadpool(self.compressor.compress, body)
+            body += self.compressor.flush()
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
@@ -0,0 +1,56 @@
+"""
+Parallel fan-out of single-ticker fetchers.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import os
+
+import pandas as pd
+
+
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+executor = ThreadPoolExecutor(
+    max_workers=BATCH_MAX_WORKERS, thread_name_prefix="batch"
+)
+
+
+def fetch_one(fetcher, key):
+    try:
+        return fetcher(key)
+    except Exception as exception:  # pylint: disable=broad-except
+        return None, str(exception)
+
+
+def fetch_many(fetcher, keys):
+    """
+    Runs a fetcher for several keys concurrently on the shared worker pool.
+
+    Parameters
+    ----------
+        fetcher: func(key)
+            Returns a tuple (pd.DataFrame, error message).
+        keys: list
+            Tickers or RICs, duplicates are fetched once.
+
+    Returns
+    -------
+        tuple
+            The frames concatenated in long format (or None if all keys
+            failed) and a dict of error messages by key (or None).
+    """
+    keys = list(dict.fromkeys(keys))
+    futures = [
+        executor.submit(contextvars.copy_context().run, fetch_one, fetcher, key)
+        for key in keys
+    ]
+    frames = []
+    errors = {}
+    for key, future in zip(keys, futures):
+        dfm, error_message = future.result()
+        if error_message is not None:
+            errors[key] = error_message
+        elif dfm is not None and dfm.shape[0] > 0:
+            frames.append(dfm)
+    dfm = pd.concat(frames).sort_index() if len(frames) > 0 else None
+    return dfm, errors if len(errors) > 0 else None
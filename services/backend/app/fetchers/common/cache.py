@@ -2,29 +2,104 @@
 Caching management module in Minio.
 """
 
-from datetime import datetime, timedelta
+import asyncio
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from datetime import date, datetime
+import functools
 from http.client import TOO_MANY_REQUESTS
 import json
 import os
-import tempfile
+import threading
 
 from dateutil.relativedelta import relativedelta
+import orjson
 import pandas as pd
+import pyarrow as pa
 import ring
-from tqdm import tqdm
 
+from .disk_cache import read_frame, write_frame
+from .etag import record_dependency
+from .frame_cache import delete_frame, get_frame, set_frame
+from .metrics import CACHE_LOOKUPS, timed, timed_function
 from .minio import (
+    aget_object_if_exists,
+    amake_bucket_if_not_exists,
+    aput_object,
+    aremove_object,
+    astat_object_if_exists,
     exists_object,
-    fget_object,
+    get_object,
+    get_object_if_exists,
     make_bucket_if_not_exists,
-    put_object,
-    stat_object,
+    put_bytes,
+    remove_object,
+    stat_object_if_exists,
+)
+from .manifest import get_manifest, list_ric_objects, record_object, record_removal
+from .single_flight import arun_once, run_once
+from .storage import (
+    frame_to_parquet,
+    is_parquet,
+    is_year_object,
+    json_name,
+    month_end,
+    month_objects,
+    parquet_name,
+    parquet_to_frame,
+    should_refresh,
 )
 
 
 EIKON_NOT_RUNNING = "Eikon not running"
 TOO_MANY_REQUESTS = "Too many requests"
-FUNCTIONS_RETURNING_STRING_INDEX = ["dividend__raw", "risk_free_rate__raw"]
+STREAM_PREFETCH_MONTHS = int(os.getenv("STREAM_PREFETCH_MONTHS", "4"))
+MONTH_MAX_WORKERS = int(os.getenv("MONTH_MAX_WORKERS", "16"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "16"))
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "4"))
+INCREMENTAL_REFRESH = os.getenv("INCREMENTAL_REFRESH", "1") == "1"
+UPSTREAM_BATCH_RICS = int(os.getenv("UPSTREAM_BATCH_RICS", "10"))
+# Error of a month whose object was removed since the manifest was listed
+OBJECT_REMOVED = "Object removed"
+# Key added to the rows while de-duplicating them month by month
+MONTH_COLUMN = "__month__"
+
+FUNCTIONS_RETURNING_STRING_INDEX = [
+    "arisk_free_rate__raw",
+    "dividend__raw",
+    "risk_free_rate__raw",
+]
+
+# Months are fetched on their own pool: cache_in_s3 also runs on the batch
+# pool, which must not wait on itself.
+month_executor = ThreadPoolExecutor(
+    max_workers=MONTH_MAX_WORKERS, thread_name_prefix="month"
+)
+s3_slots = threading.BoundedSemaphore(S3_MAX_CONCURRENCY)
+upstream_slots = threading.BoundedSemaphore(UPSTREAM_MAX_CONCURRENCY)
+async_slots = None
+
+
+def decode_json(content: bytes):
+    """
+    Decodes JSON with orjson, falling back on the standard library for the
+    NaN and Infinity literals older objects may hold.
+    """
+    with timed("json-decode"):
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return json.loads(content)
+
+
+def encode_json(response):
+    return orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS)
+
+
+def read_from_s3(bucket_name: str, object_name: str):
+    response = decode_json(get_object(bucket_name, object_name))
+    return response["data"], response["error"]
 
 
 @ring.lru()
@@ -47,29 +122,74 @@ def download_from_s3(bucket_name: str, object_name: str):
     """
     if not exists_object(bucket_name, object_name):
         return None, None
-    with tempfile.NamedTemporaryFile(suffix=".json") as temp_file:
-        fget_object(bucket_name, object_name, temp_file.name)
-        with open(temp_file.name, "r") as handler:
-            response = json.load(handler)
-        return response["data"], response["error"]
+    return read_from_s3(bucket_name, object_name)
 
 
-def ensure_dir(file_path: str):
+def decode_month(content, object_name, formatter):
     """
-    Creates a directory if it doesn't exist yet.
+    Decodes a month object of either storage format.
+    """
+    if is_parquet(object_name):
+        return parquet_to_frame(content)
+    response = decode_json(content)
+    with timed("format"):
+        return formatter(response["data"])
 
-    Parameters
-    ----------
-        file_path: string
 
-    Returns:
-        string
-            The path given as argument.
+def load_month_frame(bucket_name, object_name, etag, formatter):
+    """
+    Reads a month object listed in the manifest, from the fastest tier
+    holding it: memory, local disk, then Minio.
+
+    Returns
+    -------
+        pd.DataFrame
+            The formatted month, shared with the memory cache, or None if the
+            object was removed since it was listed. It is then dropped from
+            the manifest.
+    """
+    dfm = get_frame(bucket_name, object_name, etag)
+    if dfm is not None:
+        CACHE_LOOKUPS.labels(bucket_name, "memory").inc()
+        return dfm
+    dfm = read_frame(bucket_name, object_name, etag)
+    if dfm is not None:
+        CACHE_LOOKUPS.labels(bucket_name, "disk").inc()
+        set_frame(bucket_name, object_name, dfm, etag)
+        return dfm
+    CACHE_LOOKUPS.labels(bucket_name, "s3").inc()
+    content = get_object_if_exists(bucket_name, object_name)
+    if content is None:
+        record_removal(bucket_name, object_name)
+        return None
+    dfm = decode_month(content, object_name, formatter)
+    set_frame(bucket_name, object_name, dfm, etag)
+    write_frame(bucket_name, object_name, etag, dfm)
+    return dfm
+
+
+async def aload_month_frame(bucket_name, object_name, etag, formatter):
     """
-    directory = os.path.dirname(file_path)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    return file_path
+    Asynchronous `load_month_frame`.
+    """
+    dfm = get_frame(bucket_name, object_name, etag)
+    if dfm is not None:
+        CACHE_LOOKUPS.labels(bucket_name, "memory").inc()
+        return dfm
+    dfm = read_frame(bucket_name, object_name, etag)
+    if dfm is not None:
+        CACHE_LOOKUPS.labels(bucket_name, "disk").inc()
+        set_frame(bucket_name, object_name, dfm, etag)
+        return dfm
+    CACHE_LOOKUPS.labels(bucket_name, "s3").inc()
+    content = await aget_object_if_exists(bucket_name, object_name)
+    if content is None:
+        record_removal(bucket_name, object_name)
+        return None
+    dfm = decode_month(content, object_name, formatter)
+    set_frame(bucket_name, object_name, dfm, etag)
+    write_frame(bucket_name, object_name, etag, dfm)
+    return dfm
 
 
 def json_data_to_df(data: dict, version="v1"):
@@ -126,7 +246,15 @@ def safe_concat(frames, axis=0):
     return pd.concat(frames, axis=axis)
 
 
-def save_in_s3(response, bucket_name, object_name):
+def response_error(response):
+    """
+    Detects the upstream responses that must not be cached.
+
+    Returns
+    -------
+        string
+            TOO_MANY_REQUESTS, EIKON_NOT_RUNNING or None.
+    """
     too_many_requests = (
         isinstance(response, dict)
         and "data" in response
@@ -147,22 +275,322 @@ def save_in_s3(response, bucket_name, object_name):
     )
     if eikon_not_running:
         return EIKON_NOT_RUNNING
-    temp_dir = tempfile.TemporaryDirectory()
-    path = os.path.join(temp_dir.name, object_name)
-    with open(ensure_dir(path), "w") as handler:
-        json.dump(response, handler)
+    return None
+
+
+def save_in_s3(response, bucket_name, object_name):
+    error_message = response_error(response)
+    if error_message is not None:
+        return error_message
+    make_bucket_if_not_exists(bucket_name)
+    print(f"Downloading {object_name}")
+    result = put_bytes(encode_json(response), bucket_name, object_name)
+    record_object(bucket_name, object_name, result.etag)
+    download_from_s3.delete(bucket_name, object_name)
+    delete_frame(bucket_name, object_name)
+
+
+def encode_month(response, object_name, formatter):
+    """
+    Formats a month downloaded from upstream and encodes it as Parquet, or
+    as JSON if Arrow cannot represent it.
+
+    Returns
+    -------
+        tuple
+            The frame, the encoded object, its name, and the name of the
+            object in the other format, to remove.
+    """
+    with timed("format"):
+        dfm = formatter(response["data"])
+    try:
+        content = frame_to_parquet(dfm)
+    except pa.ArrowException:
+        return dfm, encode_json(response), json_name(object_name), parquet_name(
+            object_name
+        )
+    return dfm, content, parquet_name(object_name), json_name(object_name)
+
+
+def last_stored_date(dfm):
+    """
+    Returns
+    -------
+        date
+            The last day of a cached month, or None if it is empty.
+    """
+    dates = dfm.index.dropna()
+    if dfm.shape[0] == 0 or len(dates) == 0:
+        return None
+    return pd.Timestamp(dates.max()).date()
+
+
+def merge_days(response, dfm, formatter):
+    """
+    Merges the days downloaded since the last stored one into a cached month,
+    downloaded days replacing stored ones, and encodes it as Parquet.
+
+    Returns
+    -------
+        tuple
+            The merged month and the encoded object, or None if Arrow cannot
+            represent it.
+    """
+    with timed("format"):
+        days = formatter(response["data"])
+        if days.shape[0] > 0:
+            dfm = pd.concat([dfm, days])
+            dfm = dfm.loc[~dfm.index.duplicated(keep="last")].sort_index()
+    try:
+        return dfm, frame_to_parquet(dfm)
+    except pa.ArrowException:
+        return None
+
+
+def save_month(response, bucket_name, object_name, formatter, cached_name=None):
+    """
+    Stores a month downloaded from upstream, unless it is an error.
+
+    `cached_name` is the object of the month the plan read, if any.
+
+    Returns
+    -------
+        tuple
+            The formatted month and an error message.
+    """
+    error_message = response_error(response)
+    if error_message is not None:
+        return None, error_message
+    dfm, content, object_name, other_name = encode_month(
+        response, object_name, formatter
+    )
+    return write_month(dfm, content, bucket_name, object_name, other_name, cached_name)
+
+
+def append_month(response, dfm, bucket_name, object_name, formatter, cached_name=None):
+    """
+    Stores a cached month with the days downloaded since its last one, the
+    object being replaced at once.
+
+    Returns
+    -------
+        tuple
+            The merged month and an error message, or (None, None) if the
+            merged month cannot be stored as Parquet.
+    """
+    error_message = response_error(response)
+    if error_message is not None:
+        return None, error_message
+    merged = merge_days(response, dfm, formatter)
+    if merged is None:
+        return None, None
+    dfm, content = merged
+    return write_month(
+        dfm,
+        content,
+        bucket_name,
+        parquet_name(object_name),
+        json_name(object_name),
+        cached_name,
+    )
+
+
+def has_other_object(bucket_name, other_name, cached_name):
+    """
+    Tells if the version of a month in the other format exists, from the
+    manifest or else from the object the plan read. A leftover older object
+    is harmless, the object written last holding the month.
+    """
+    manifest = get_manifest(bucket_name)
+    if manifest is not None:
+        return manifest.get(other_name) is not None
+    return cached_name == other_name
+
+
+def write_month(dfm, content, bucket_name, object_name, other_name, cached_name=None):
+    """
+    Replaces a month object, removing its version in the other format if it
+    exists.
+    """
     make_bucket_if_not_exists(bucket_name)
     print(f"Downloading {object_name}")
-    put_object(path, bucket_name, object_name)
-    temp_dir.cleanup()
+    result = put_bytes(content, bucket_name, object_name)
+    record_object(bucket_name, object_name, result.etag)
+    if has_other_object(bucket_name, other_name, cached_name):
+        remove_object(bucket_name, other_name)
+        record_removal(bucket_name, other_name)
+        delete_frame(bucket_name, other_name)
+    set_frame(bucket_name, object_name, dfm, result.etag)
+    return dfm, None
+
+
+async def asave_month(response, bucket_name, object_name, formatter, cached_name=None):
+    """
+    Asynchronous `save_month`.
+    """
+    error_message = response_error(response)
+    if error_message is not None:
+        return None, error_message
+    dfm, content, object_name, other_name = encode_month(
+        response, object_name, formatter
+    )
+    return await awrite_month(
+        dfm, content, bucket_name, object_name, other_name, cached_name
+    )
+
+
+async def aappend_month(
+    response, dfm, bucket_name, object_name, formatter, cached_name=None
+):
+    """
+    Asynchronous `append_month`.
+    """
+    error_message = response_error(response)
+    if error_message is not None:
+        return None, error_message
+    merged = merge_days(response, dfm, formatter)
+    if merged is None:
+        return None, None
+    dfm, content = merged
+    return await awrite_month(
+        dfm,
+        content,
+        bucket_name,
+        parquet_name(object_name),
+        json_name(object_name),
+        cached_name,
+    )
+
+
+async def awrite_month(
+    dfm, content, bucket_name, object_name, other_name, cached_name=None
+):
+    await amake_bucket_if_not_exists(bucket_name)
+    print(f"Downloading {object_name}")
+    result = await aput_object(content, bucket_name, object_name)
+    record_object(bucket_name, object_name, result.etag)
+    if has_other_object(bucket_name, other_name, cached_name):
+        await aremove_object(bucket_name, other_name)
+        record_removal(bucket_name, other_name)
+        delete_frame(bucket_name, other_name)
+    set_frame(bucket_name, object_name, dfm, result.etag)
+    return dfm, None
+
+
+def month_range(start_date, end_date):
+    """
+    Lists the first day of every month overlapping a date range.
+    """
+    month = date(start_date.year, start_date.month, 1)
+    months = []
+    while month <= date(end_date.year, end_date.month, 1):
+        months.append(month)
+        month += relativedelta(months=1)
+    return months
+
+
+@timed_function("concat")
+def drop_repeated_rows(dfm):
+    """
+    Drops the rows repeating another row of the same month.
+
+    Every month is de-duplicated on its own, before the range is cut, so that
+    a range read month by month (streams, pages) keeps the same rows as the
+    range read at once.
+    """
+    months = dfm.index.year * 100 + dfm.index.month
+    return dfm.loc[~dfm.assign(**{MONTH_COLUMN: months}).duplicated(keep=False)]
+
+
+def concat_frames(frames, func_name, start_date, end_date):
+    if len(frames) == 0:
+        return None, "No data"
+    dfm = safe_concat(frames)
+    dfm = dfm.loc[dfm.index.dropna()]
+    if func_name in FUNCTIONS_RETURNING_STRING_INDEX:
+        dfm.index = pd.to_datetime(dfm.index, format="%Y-%m-%d")
+    dfm = drop_repeated_rows(dfm)
+    index = (dfm.index >= start_date) & (dfm.index <= end_date)
+    return dfm.loc[index, :], None
+
+
+@timed_function("plan")
+def plan_months(bucket_name, ric, start_date, end_date):
+    """
+    Resolves which months of a range are read from Minio and which are
+    downloaded, with a single listing of the objects of the RIC. The months
+    of a compacted year are read at once, from the year object.
+
+    Returns
+    -------
+        list
+            Tuples (first day of the month, object name, etag of the cached
+            object, should download).
+    """
+    objects = month_objects(list_ric_objects(bucket_name, ric))
+    months = month_range(start_date, end_date)
+    plan = []
+    for month_start_date in months:
+        month = month_start_date.isoformat()[:7]
+        cached = objects.get(month)
+        if cached is None:
+            plan.append((month_start_date, f"{ric}/{month}.parquet", None, True))
+            continue
+        if is_year_object(cached.object_name):
+            if not plan or plan[-1][1] != cached.object_name:
+                plan.append((month_start_date, cached.object_name, cached.etag, False))
+            continue
+        should_download_object = should_refresh(
+            cached.last_modified, month_start_date, month_start_date == months[-1]
+        )
+        plan.append(
+            (month_start_date, cached.object_name, cached.etag, should_download_object)
+        )
+    return plan
+
+
+async def aplan_months(bucket_name, ric, start_date, end_date):
+    """
+    Asynchronous `plan_months`, the listing running in a thread.
+    """
+    return await asyncio.get_event_loop().run_in_executor(
+        None,
+        functools.partial(
+            contextvars.copy_context().run,
+            plan_months,
+            bucket_name,
+            ric,
+            start_date,
+            end_date,
+        ),
+    )
+
+
+def get_async_slots():
+    """
+    Semaphores limiting the concurrent S3 reads and upstream fetches of the
+    asynchronous cache, created in the running event loop.
+    """
+    global async_slots  # pylint: disable=global-statement
+    loop = asyncio.get_event_loop()
+    if async_slots is None or async_slots[0] is not loop:
+        async_slots = (
+            loop,
+            asyncio.Semaphore(S3_MAX_CONCURRENCY),
+            asyncio.Semaphore(UPSTREAM_MAX_CONCURRENCY),
+        )
+    return async_slots[1], async_slots[2]
 
 
-def cache_in_s3(bucket_name, formatter):
+def cache_in_s3(bucket_name, formatter, batch_func=None):
     """
     Parameters:
     -----------
     bucket_name: string
         Where data should be saved
+    batch_func: func(rics, start_date, end_date)
+        Downloader of several RICs at once used by `prefetch`, returning the
+        responses by RIC or an upstream error response
     """
 
     def decorator(func):
@@ -173,60 +601,394 @@ def cache_in_s3(bucket_name, formatter):
             Data downloader
         """
 
+        def download_month(ric, month_start_date, cached_name, etag, waited):
+            object_name = parquet_name(cached_name)
+            planned_name = cached_name if etag is not None else None
+            # Another worker may just have downloaded the month, which the
+            # manifest may not show yet
+            if waited or get_manifest(bucket_name) is not None:
+                with s3_slots:
+                    cached = stat_object_if_exists(bucket_name, object_name)
+                    if cached is not None:
+                        if not should_refresh(
+                            cached.last_modified, month_start_date, True
+                        ):
+                            dfm = load_month_frame(
+                                bucket_name, object_name, cached.etag, formatter
+                            )
+                            if dfm is not None:
+                                return dfm, None
+                        else:
+                            cached_name, etag = object_name, cached.etag
+            # A stale Parquet month only needs the days since its last one
+            last_date = None
+            if INCREMENTAL_REFRESH and etag is not None and is_parquet(cached_name):
+                with s3_slots:
+                    dfm = load_month_frame(bucket_name, cached_name, etag, formatter)
+                if dfm is not None:
+                    last_date = last_stored_date(dfm)
+            month_end_date = month_end(month_start_date)
+            with upstream_slots:
+                if last_date is not None:
+                    CACHE_LOOKUPS.labels(bucket_name, "append").inc()
+                    # The last day is downloaded again, as it may have been
+                    # stored before the close
+                    response = func(ric, last_date, month_end_date)
+                    merged, error_message = append_month(
+                        response, dfm, bucket_name, object_name, formatter, planned_name
+                    )
+                    if merged is not None or error_message is not None:
+                        return merged, error_message
+                CACHE_LOOKUPS.labels(bucket_name, "upstream").inc()
+                response = func(ric, month_start_date, month_end_date)
+                return save_month(
+                    response, bucket_name, object_name, formatter, planned_name
+                )
+
+        def load_month(ric, month_start_date, object_name, etag, download, failed):
+            if failed.is_set():
+                return None, None
+            if not download:
+                with s3_slots:
+                    dfm = load_month_frame(bucket_name, object_name, etag, formatter)
+                if dfm is None:
+                    failed.set()
+                    return None, OBJECT_REMOVED
+                return dfm, None
+            # Concurrent requests of the month share a single download
+            dfm, error_message = run_once(
+                (bucket_name, parquet_name(object_name)),
+                lambda waited: download_month(
+                    ric, month_start_date, object_name, etag, waited
+                ),
+            )
+            if error_message is not None:
+                failed.set()
+            return dfm, error_message
+
         def inner(ric, start_date, end_date):
+            record_dependency(bucket_name, ric, start_date, end_date)
+            dfm, error_message = load_range(ric, start_date, end_date)
+            if error_message == OBJECT_REMOVED:
+                # The removed object is no longer in the manifest: the months
+                # it held are planned again
+                dfm, error_message = load_range(ric, start_date, end_date)
+            return dfm, error_message
+
+        def load_range(ric, start_date, end_date):
+            plan = plan_months(bucket_name, ric, start_date, end_date)
+            failed = threading.Event()
+            futures = [
+                month_executor.submit(
+                    contextvars.copy_context().run, load_month, ric, *month, failed
+                )
+                for month in plan
+            ]
             frames = []
-            delta = end_date - start_date
-            for i in tqdm(range(delta.days + 1)):
-                day = start_date + timedelta(days=i)
-                object_name = f"{ric}/{day.isoformat()[:7]}.json"
-                change_of_month = day.month != (day - timedelta(days=1)).month
-                first_day = day == start_date
-                is_new_month = change_of_month or first_day
-                if is_new_month:
-                    last_month = (
-                        day.month == end_date.month and day.year == end_date.year
+            try:
+                for future in futures:
+                    dfm, error_message = future.result()
+                    if error_message is not None:
+                        return None, error_message
+                    if dfm is not None and dfm.shape[0] > 0:
+                        frames.append(dfm)
+            finally:
+                # Months not started yet are skipped on errors
+                failed.set()
+                for future in futures:
+                    future.cancel()
+            return concat_frames(frames, func.__name__, start_date, end_date)
+
+        def write_group_month(response, base, month_start_date, waited):
+            object_name, etag, dfm, last_date = base
+            planned_name = object_name if etag is not None else None
+            if waited:
+                # Another worker held the month and may have downloaded it
+                cached = stat_object_if_exists(bucket_name, parquet_name(object_name))
+                if cached is not None and not should_refresh(
+                    cached.last_modified, month_start_date, True
+                ):
+                    stored = load_month_frame(
+                        bucket_name, cached.object_name, cached.etag, formatter
                     )
-                    this_object_exists = exists_object(bucket_name, object_name)
-                    if this_object_exists and change_of_month and last_month:
-                        last_modified = stat_object(
-                            bucket_name, object_name
-                        ).last_modified
-                        already_downloaded_today = (
-                            last_modified.date() == datetime.utcnow().date()
+                    if stored is not None:
+                        return stored, None
+            if last_date is None:
+                return save_month(
+                    response, bucket_name, object_name, formatter, planned_name
+                )
+            # Left to be downloaded alone if Arrow cannot store the merged month
+            return append_month(
+                response, dfm, bucket_name, object_name, formatter, planned_name
+            )
+
+        def download_group(month_start_date, group):
+            """
+            Downloads a month of several RICs in one upstream call. Every RIC
+            is stored under its single-flight key, so that concurrent
+            downloads of the month share its result rather than storing it
+            again.
+
+            Returns
+            -------
+                tuple
+                    An upstream error message, or None, and a dict of error
+                    messages by RIC.
+            """
+            bases = {}
+            for ric, object_name, etag in group:
+                dfm = None
+                if INCREMENTAL_REFRESH and etag is not None and is_parquet(object_name):
+                    with s3_slots:
+                        dfm = load_month_frame(
+                            bucket_name, object_name, etag, formatter
                         )
-                    should_download_object = not this_object_exists or (
-                        change_of_month and last_month and not already_downloaded_today
-                    )
-                    if should_download_object:
-                        month_start_date = datetime(day.year, day.month, 1).date()
-                        month_end_date = (
-                            month_start_date
-                            + relativedelta(months=1)
-                            - timedelta(days=1)
+                last_date = None if dfm is None else last_stored_date(dfm)
+                bases[ric] = (object_name, etag, dfm, last_date)
+            group_start_date = min(
+                last_date or month_start_date for _, _, _, last_date in bases.values()
+            )
+            with upstream_slots:
+                CACHE_LOOKUPS.labels(bucket_name, "batch").inc(len(group))
+                responses = batch_func(
+                    list(bases), group_start_date, month_end(month_start_date)
+                )
+            error_message = response_error(responses)
+            if error_message is not None:
+                return error_message, {}
+            errors = {}
+            for ric, response in responses.items():
+                if ric not in bases:
+                    continue
+                base = bases[ric]
+                _, error_message = run_once(
+                    (bucket_name, parquet_name(base[0])),
+                    functools.partial(
+                        write_group_month, response, base, month_start_date
+                    ),
+                )
+                if error_message is not None:
+                    errors[ric] = error_message
+            return None, errors
+
+        def prefetch(rics, start_date, end_date):
+            """
+            Downloads the missing and stale months of several RICs, requesting
+            the RICs of a month together, so that calling the function for
+            each RIC then reads them from the cache. RICs missing from the
+            combined response, or failing to be stored, are left to be
+            downloaded alone, their errors being logged.
+
+            Returns
+            -------
+                string
+                    An error message, or None.
+            """
+            if batch_func is None:
+                return None
+            rics = list(dict.fromkeys(rics))
+            plans = [
+                month_executor.submit(
+                    contextvars.copy_context().run,
+                    plan_months,
+                    bucket_name,
+                    ric,
+                    start_date,
+                    end_date,
+                )
+                for ric in rics
+            ]
+            months = defaultdict(list)
+            for ric, plan in zip(rics, plans):
+                for month_start_date, object_name, etag, download in plan.result():
+                    if download:
+                        months[month_start_date].append((ric, object_name, etag))
+            futures = [
+                month_executor.submit(
+                    contextvars.copy_context().run,
+                    download_group,
+                    month_start_date,
+                    units[i : i + UPSTREAM_BATCH_RICS],
+                )
+                for month_start_date, units in sorted(months.items())
+                for i in range(0, len(units), UPSTREAM_BATCH_RICS)
+                # A single RIC is better downloaded alone, coalesced with
+                # concurrent requests of the month
+                if len(units[i : i + UPSTREAM_BATCH_RICS]) > 1
+            ]
+            try:
+                for future in futures:
+                    error_message, errors = future.result()
+                    if error_message is not None:
+                        return error_message
+                    for ric, ric_error_message in errors.items():
+                        print(
+                            f"Prefetching {bucket_name}/{ric} failed: "
+                            f"{ric_error_message}"
                         )
-                        response = func(ric, month_start_date, month_end_date)
-                        error_message = save_in_s3(response, bucket_name, object_name)
-                        if error_message is None:
-                            data, _ = response["data"], response["error"]
-                            dfm = formatter(data)
+            finally:
+                for future in futures:
+                    future.cancel()
+            return None
+
+        inner.prefetch = prefetch
+        return inner
+
+    return decorator
+
+
+def acache_in_s3(bucket_name, formatter):
+    """
+    Asynchronous `cache_in_s3`, months being read concurrently.
+
+    Parameters:
+    -----------
+    bucket_name: string
+        Where data should be saved
+    """
+
+    def decorator(func):
+        """
+        Parameters:
+        -----------
+        func: async func(ric, start_date, end_date)
+            Data downloader
+        """
+
+        async def adownload_month(ric, month_start_date, cached_name, etag, waited):
+            s3_slots, upstream_slots = get_async_slots()
+            object_name = parquet_name(cached_name)
+            planned_name = cached_name if etag is not None else None
+            # Another worker may just have downloaded the month, which the
+            # manifest may not show yet
+            if waited or get_manifest(bucket_name) is not None:
+                async with s3_slots:
+                    cached = await astat_object_if_exists(bucket_name, object_name)
+                    if cached is not None:
+                        if not should_refresh(
+                            cached.last_modified, month_start_date, True
+                        ):
+                            dfm = await aload_month_frame(
+                                bucket_name, object_name, cached.etag, formatter
+                            )
+                            if dfm is not None:
+                                return dfm, None
                         else:
-                            return None, error_message
-                    else:
-                        data, _ = download_from_s3(bucket_name, object_name)
-                        dfm = formatter(data)
+                            cached_name, etag = object_name, cached.etag
+            # A stale Parquet month only needs the days since its last one
+            last_date = None
+            if INCREMENTAL_REFRESH and etag is not None and is_parquet(cached_name):
+                async with s3_slots:
+                    dfm = await aload_month_frame(
+                        bucket_name, cached_name, etag, formatter
+                    )
+                if dfm is not None:
+                    last_date = last_stored_date(dfm)
+            month_end_date = month_end(month_start_date)
+            async with upstream_slots:
+                if last_date is not None:
+                    CACHE_LOOKUPS.labels(bucket_name, "append").inc()
+                    # The last day is downloaded again, as it may have been
+                    # stored before the close
+                    response = await func(ric, last_date, month_end_date)
+                    merged, error_message = await aappend_month(
+                        response, dfm, bucket_name, object_name, formatter, planned_name
+                    )
+                    if merged is not None or error_message is not None:
+                        return merged, error_message
+                CACHE_LOOKUPS.labels(bucket_name, "upstream").inc()
+                response = await func(ric, month_start_date, month_end_date)
+                return await asave_month(
+                    response, bucket_name, object_name, formatter, planned_name
+                )
+
+        async def load_month(ric, month_start_date, object_name, etag, download):
+            if not download:
+                s3_slots, _ = get_async_slots()
+                async with s3_slots:
+                    dfm = await aload_month_frame(
+                        bucket_name, object_name, etag, formatter
+                    )
+                if dfm is None:
+                    return None, OBJECT_REMOVED
+                return dfm, None
+            # Concurrent requests of the month share a single download
+            return await arun_once(
+                (bucket_name, parquet_name(object_name)),
+                lambda waited: adownload_month(
+                    ric, month_start_date, object_name, etag, waited
+                ),
+            )
+
+        async def inner(ric, start_date, end_date):
+            record_dependency(bucket_name, ric, start_date, end_date)
+            dfm, error_message = await load_range(ric, start_date, end_date)
+            if error_message == OBJECT_REMOVED:
+                # The removed object is no longer in the manifest: the months
+                # it held are planned again
+                dfm, error_message = await load_range(ric, start_date, end_date)
+            return dfm, error_message
+
+        async def load_range(ric, start_date, end_date):
+            plan = await aplan_months(bucket_name, ric, start_date, end_date)
+            tasks = [asyncio.ensure_future(load_month(ric, *month)) for month in plan]
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    _, error_message = await next_result
+                    if error_message is not None:
+                        return None, error_message
+            finally:
+                for task in tasks:
+                    task.cancel()
+            frames = []
+            for task in tasks:
+                dfm, _ = task.result()
+                if dfm.shape[0] > 0:
+                    frames.append(dfm)
+            return concat_frames(frames, func.__name__, start_date, end_date)
+
+        async def iter_months(ric, start_date, end_date):
+            """
+            Yields tuples (pd.DataFrame, error message) month by month, or
+            year by year for compacted years, a few objects being read ahead.
+            Empty months are skipped.
+            """
+            months = deque(await aplan_months(bucket_name, ric, start_date, end_date))
+            pending = deque()
+            is_replanned = False
+            try:
+                while len(months) > 0 or len(pending) > 0:
+                    while len(months) > 0 and len(pending) < STREAM_PREFETCH_MONTHS:
+                        month = months.popleft()
+                        pending.append(
+                            (month, asyncio.ensure_future(load_month(ric, *month)))
+                        )
+                    month, task = pending.popleft()
+                    dfm, error_message = await task
+                    if error_message == OBJECT_REMOVED and not is_replanned:
+                        # The months left are planned again, without the
+                        # removed object
+                        is_replanned = True
+                        for _, task in pending:
+                            task.cancel()
+                        pending.clear()
+                        months = deque(
+                            await aplan_months(bucket_name, ric, month[0], end_date)
+                        )
+                        continue
+                    if error_message is not None:
+                        yield None, error_message
+                        return
+                    if dfm.shape[0] == 0:
+                        continue
+                    dfm, _ = concat_frames([dfm], func.__name__, start_date, end_date)
                     if dfm.shape[0] > 0:
-                        frames.append(dfm)
-            if len(frames) == 0:
-                return None, "No data"
-            dfm = safe_concat(frames)
-            dfm = dfm.loc[dfm.index.dropna()]
-            if func.__name__ in FUNCTIONS_RETURNING_STRING_INDEX:
-                dfm.index = pd.to_datetime(dfm.index, format="%Y-%m-%d")
-            index = (dfm.index >= start_date) & (dfm.index <= end_date)
-            dfm = dfm.loc[index, :]
-            dfm.drop_duplicates(keep=False, inplace=True)
-            return dfm, None
+                        yield dfm, None
+            finally:
+                for _, task in pending:
+                    task.cancel()
 
+        inner.iter_months = iter_months
         return inner
 
     return decorator
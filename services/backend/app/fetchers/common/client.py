@@ -1,50 +1,131 @@
+import json
 import os
 
 import pandas as pd
 import requests
 
+from .compression import ENCODINGS, GZIP, decompress
+from .serialization import (
+    ARROW,
+    JSON,
+    NDJSON,
+    bytes_to_dataframe,
+    media_type_to_format,
+)
+
 
 class Client:
-    def __init__(self):
+    def __init__(self, response_format=ARROW):
         self.headers = {"Authorization": os.getenv("DATA_SECRET_KEY")}
+        self.response_format = response_format
+
+    def get_dataframe(self, url, params, index):
+        with requests.get(
+            url,
+            headers={**self.headers, "Accept-Encoding": ", ".join(ENCODINGS)},
+            params={**params, "format": self.response_format},
+            stream=True,
+        ) as response:
+            content = decompress(
+                response.raw.read(decode_content=False),
+                response.headers.get("Content-Encoding"),
+            )
+        content_type = response.headers.get("Content-Type", "")
+        media_format = media_type_to_format(content_type)
+        if media_format is not None and media_format != JSON:
+            dfm = bytes_to_dataframe(content, media_format)
+            error = response.headers.get("X-Error")
+            return dfm.set_index(index), json.loads(error) if error else None
+        response_json = json.loads(content)
+        error = response_json["error"]
+        data = response_json["data"]
+        if data is None:
+            return None, error
+        dfm = pd.DataFrame.from_dict(data)
+        dfm = dfm.set_index(index)
+        return dfm, error
+
+    def iter_dataframes(self, url, params, index, chunk_size=1000):
+        """
+        Streams newline-delimited JSON and yields tuples (pd.DataFrame, error
+        message), the frames having at most `chunk_size` rows. An error is
+        yielded as (None, error message) and ends the iteration.
+        """
+        with requests.get(
+            url,
+            headers={**self.headers, "Accept-Encoding": GZIP},
+            params={**params, "format": NDJSON},
+            stream=True,
+        ) as response:
+            records = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                record = json.loads(line)
+                if "error" in record and record.get("data", 0) is None:
+                    yield None, record["error"]
+                    return
+                records.append(record)
+                if len(records) >= chunk_size:
+                    yield pd.DataFrame.from_dict(records).set_index(index), None
+                    records = []
+            if len(records) > 0:
+                yield pd.DataFrame.from_dict(records).set_index(index), None
 
     def get_daily_factor(self, path, ticker, start_date, end_date):
-        response = requests.get(
+        return self.get_dataframe(
             f"http://localhost:8000/daily/factor/{path}",
-            headers=self.headers,
             params={
                 "ticker": ticker,
                 "start_date": start_date,
                 "end_date": end_date,
             },
+            index=["Date", "Stem"],
+        )
+
+    def get_daily_factors(self, path, tickers, start_date, end_date):
+        return self.get_dataframe(
+            f"http://localhost:8000/batch/daily/factor/{path}",
+            params={
+                "tickers": tickers,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            index=["Date", "Stem"],
         )
-        response_json = response.json()
-        error = response_json["error"]
-        data = response_json["data"]
-        if data is None:
-            return None, error
-        dfm = pd.DataFrame.from_dict(data)
-        dfm = dfm.set_index(["Date", "Stem"])
-        return dfm, error
 
     def get_daily_ohlcv(self, ric, start_date, end_date):
-        response = requests.get(
+        return self.get_dataframe(
             "http://localhost:8000/daily/ohlcv",
-            headers=self.headers,
             params={
                 "ric": ric,
                 "start_date": start_date,
                 "end_date": end_date,
             },
+            index=["Date", "RIC"],
+        )
+
+    def get_daily_ohlcvs(self, rics, start_date, end_date):
+        return self.get_dataframe(
+            "http://localhost:8000/batch/daily/ohlcv",
+            params={
+                "rics": rics,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            index=["Date", "RIC"],
+        )
+
+    def iter_daily_ohlcv(self, ric, start_date, end_date):
+        return self.iter_dataframes(
+            "http://localhost:8000/daily/ohlcv",
+            params={
+                "ric": ric,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            index=["Date", "RIC"],
         )
-        response_json = response.json()
-        error = response_json["error"]
-        data = response_json["data"]
-        if data is None:
-            return None, error
-        dfm = pd.DataFrame.from_dict(data)
-        dfm = dfm.set_index(["Date", "RIC"])
-        return dfm, error
 
     def get_daily_risk_free_rate(self, ric, start_date, end_date):
         response = requests.get(
@@ -0,0 +1,109 @@
+"""
+HTTP content codings shared by the server and the client.
+"""
+import zlib
+
+import brotli
+import zstandard
+
+
+BROTLI = "br"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# By order of preference
+ENCODINGS = [ZSTD, BROTLI, GZIP]
+
+
+def negotiate_encoding(accept_encoding: str):
+    """
+    Picks the preferred content coding accepted by the client.
+
+    Parameters
+    ----------
+        accept_encoding: string
+            Value of the Accept-Encoding header.
+
+    Returns
+    -------
+        string
+            The coding, or None if the body should be sent as is.
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        parts = item.strip().split(";")
+        quality = 1.0
+        for parameter in parts[1:]:
+            name, _, value = parameter.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class Compressor:
+    """
+    Incremental compressor for a content coding.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == BROTLI:
+            self.compressor = brotli.Compressor(quality=5)
+        elif encoding == GZIP:
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif encoding == ZSTD:
+            self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding {encoding}")
+
+    def compress(self, content: bytes):
+        if self.encoding == BROTLI:
+            return self.compressor.process(content)
+        return self.compressor.compress(content)
+
+    def compress_chunk(self, content: bytes):
+        """
+        Compresses a chunk of a stream and flushes it, so that the client can
+        decode it without waiting for the end of the stream.
+        """
+        if self.encoding == BROTLI:
+            return self.compressor.process(content) + self.compressor.flush()
+        if self.encoding == GZIP:
+            return self.compressor.compress(content) + self.compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        return self.compressor.compress(content) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def flush(self):
+        if self.encoding == BROTLI:
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress(content: bytes, encoding: str):
+    compressor = Compressor(encoding)
+    return compressor.compress(content) + compressor.flush()
+
+
+def decompress(content: bytes, encoding: str):
+    """
+    Decodes a body according to its Content-Encoding header.
+    """
+    if encoding is None or encoding == "identity":
+        return content
+    if encoding == BROTLI:
+        return brotli.decompress(content)
+    if encoding == GZIP:
+        return zlib.decompress(content, 47)
+    if encoding == ZSTD:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(content)
+    raise ValueError(f"Unsupported encoding {encoding}")
@@ -0,0 +1,145 @@
+"""
+Node-local disk tier of the month cache, in front of Minio.
+
+Formatted month partitions are kept as uncompressed Arrow IPC (Feather v2)
+files and read back through memory maps, so that repeat reads, after a
+restart or from another worker of the node, cost a page-cache hit instead of
+a download and a JSON parsing. Files are named after the etag of the Minio
+object they were built from: a refreshed object is never served from an
+outdated file. The least recently read files are evicted once the cache grows
+over `DISK_CACHE_MAX_BYTES` (0 disables the tier).
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+import pyarrow as pa
+
+from .etag import CODE_VERSION
+from .metrics import timed
+
+
+DISK_CACHE_DIR = os.getenv(
+    "DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "data-server-cache")
+)
+DISK_CACHE_MAX_BYTES = int(os.getenv("DISK_CACHE_MAX_BYTES", str(2 * 1024**3)))
+SUFFIX = ".arrow"
+
+size_lock = threading.Lock()
+total_size = None
+
+
+def is_enabled():
+    return DISK_CACHE_MAX_BYTES > 0
+
+
+def cache_path(bucket_name, object_name, etag):
+    key = f"{CODE_VERSION}:{bucket_name}/{object_name}:{etag}"
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(DISK_CACHE_DIR, digest[:2], digest + SUFFIX)
+
+
+def read_frame(bucket_name, object_name, etag):
+    """
+    Returns
+    -------
+        pd.DataFrame
+            The cached frame, or None if it is not on disk.
+    """
+    if not is_enabled() or etag is None:
+        return None
+    path = cache_path(bucket_name, object_name, etag)
+    try:
+        with timed("disk-read"):
+            with pa.memory_map(path, "r") as source:
+                dfm = pa.ipc.open_file(source).read_all().to_pandas()
+        # The modification time orders files for eviction
+        os.utime(path)
+    except (OSError, pa.ArrowException):
+        return None
+    return dfm
+
+
+def write_frame(bucket_name, object_name, etag, dfm):
+    """
+    Stores a frame, silently giving up on frames Arrow cannot represent and
+    on file system errors: the disk tier is only an optimization.
+    """
+    if not is_enabled() or etag is None:
+        return
+    path = cache_path(bucket_name, object_name, etag)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with timed("disk-write"):
+            table = pa.Table.from_pandas(dfm)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with pa.OSFile(temp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+        size = os.path.getsize(path)
+    except (OSError, pa.ArrowException):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+    add_size(size)
+
+
+def list_files():
+    """
+    Returns
+    -------
+        list
+            Tuples (modification time, size, path) of the cached files.
+    """
+    files = []
+    for root, _, filenames in os.walk(DISK_CACHE_DIR):
+        for filename in filenames:
+            if not filename.endswith(SUFFIX):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def add_size(size):
+    """
+    Keeps a running total of the cache size, other workers writing in the
+    same directory being accounted for whenever the files are listed again.
+    """
+    global total_size  # pylint: disable=global-statement
+    with size_lock:
+        if total_size is None:
+            total_size = sum(size for _, size, _ in list_files())
+        else:
+            total_size += size
+        if total_size > DISK_CACHE_MAX_BYTES:
+            # Some room is left so that the next writes do not list again
+            total_size = evict(int(DISK_CACHE_MAX_BYTES * 0.9))
+
+
+def evict(max_bytes):
+    """
+    Removes the least recently read files until the cache fits in max_bytes.
+
+    Returns
+    -------
+        int
+            The size of the cache after eviction.
+    """
+    files = sorted(list_files())
+    size = sum(size for _, size, _ in files)
+    for _, file_size, path in files:
+        if size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        size -= file_size
+    return size
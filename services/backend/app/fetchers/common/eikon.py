@@ -1,27 +1,57 @@
+"""
+Client of the Eikon proxy.
+
+Calls go through a pooled aiohttp session, at most `EIKON_MAX_CONCURRENCY` at
+a time per event loop, with connect and read timeouts. A call that has not
+answered after `EIKON_HEDGE_DELAY` seconds is sent a second time, the first
+answer winning, and failed calls are retried with a backoff. Calls are paced
+by a rate limiter shared by the workers, and the calls upstream throttles
+are retried at the lowered rate. The synchronous
+functions run the same client on a background event loop, so that waiting on
+the proxy never sleeps in a request thread.
+"""
+import asyncio
+from http.client import TOO_MANY_REQUESTS
 import json
 import os
+import tempfile
+import threading
 import urllib.parse
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
+import aiohttp
 
+from .metrics import UPSTREAM_CALLS, timed
+from .rate_limit import RateLimiter
 
-EIKON_BASE_URL = "https://" + os.getenv("EIKON_DOMAIN") + ":8000"
-EIKON_SECRET_KEY = os.getenv("EIKON_SECRET_KEY")
 
-retry_strategy = Retry(
-    total=3,
-    status_forcelist=[429, 500, 502, 503, 504],
-    method_whitelist=["HEAD", "GET", "OPTIONS"],
+EIKON_BASE_URL = (
+    os.getenv("EIKON_BASE_URL") or "https://" + os.getenv("EIKON_DOMAIN") + ":8000"
+)
+EIKON_SECRET_KEY = os.getenv("EIKON_SECRET_KEY")
+EIKON_POOL_SIZE = int(os.getenv("EIKON_POOL_SIZE", "16"))
+EIKON_MAX_CONCURRENCY = int(os.getenv("EIKON_MAX_CONCURRENCY", "8"))
+EIKON_CONNECT_TIMEOUT = int(os.getenv("EIKON_CONNECT_TIMEOUT", "5"))
+EIKON_READ_TIMEOUT = int(os.getenv("EIKON_READ_TIMEOUT", "60"))
+EIKON_HEDGE_DELAY = float(os.getenv("EIKON_HEDGE_DELAY", "10"))
+EIKON_RETRIES = int(os.getenv("EIKON_RETRIES", "3"))
+EIKON_RATE = float(os.getenv("EIKON_RATE", "5"))
+EIKON_BURST = float(os.getenv("EIKON_BURST", "5"))
+EIKON_RATE_LIMIT_FILE = os.getenv(
+    "EIKON_RATE_LIMIT_FILE",
+    os.path.join(tempfile.gettempdir(), "data-server-eikon-rate-limit"),
 )
-adapter = HTTPAdapter(max_retries=retry_strategy)
-http = requests.Session()
-http.mount("https://", adapter)
-http.mount("http://", adapter)
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
 
+# Session and semaphore of each event loop
+clients = {}
+client_loop = None
+client_loop_lock = threading.Lock()
+limiter = RateLimiter("eikon", EIKON_RATE_LIMIT_FILE, EIKON_RATE, EIKON_BURST)
 
-def get_data(
+
+def data_request(
     instruments,
     fields,
     parameters=None,
@@ -41,16 +71,10 @@ def get_data(
         "raw_output": raw_output,
         "debug": debug,
     }
-    headers = {"Authorization": EIKON_SECRET_KEY}
-    response = http.get(
-        f"{EIKON_BASE_URL}/data/{instruments}/{fields}/",
-        headers=headers,
-        params=payload,
-    )
-    return response.json()
+    return f"{EIKON_BASE_URL}/data/{instruments}/{fields}/", payload
 
 
-def get_news_headlines(
+def news_headlines_request(
     query="Topic:TOPALL and Language:LEN",
     count=10,
     date_from=None,
@@ -66,23 +90,15 @@ def get_news_headlines(
         "raw_output": raw_output,
         "debug": debug,
     }
-    headers = {"Authorization": EIKON_SECRET_KEY}
-    response = http.get(
-        f"{EIKON_BASE_URL}/news_headlines/", headers=headers, params=payload
-    )
-    return response.json()
+    return f"{EIKON_BASE_URL}/news_headlines/", payload
 
 
-def get_news_story(story_id, raw_output: bool = False, debug: bool = False):
+def news_story_request(story_id, raw_output: bool = False, debug: bool = False):
     payload = {"raw_output": raw_output, "debug": debug}
-    headers = {"Authorization": EIKON_SECRET_KEY}
-    response = http.get(
-        f"{EIKON_BASE_URL}/news_story/{story_id}/", headers=headers, params=payload
-    )
-    return response.json()
+    return f"{EIKON_BASE_URL}/news_story/{story_id}/", payload
 
 
-def get_symbology(
+def symbology_request(
     symbol,
     from_symbol_type="RIC",
     to_symbol_type=None,
@@ -97,14 +113,10 @@ def get_symbology(
         "debug": debug,
         "best_match": best_match,
     }
-    headers = {"Authorization": EIKON_SECRET_KEY}
-    response = http.get(
-        f"{EIKON_BASE_URL}/symbology/{symbol}/", headers=headers, params=payload
-    )
-    return response.json()
+    return f"{EIKON_BASE_URL}/symbology/{symbol}/", payload
 
 
-def get_timeseries(
+def timeseries_request(
     rics,
     fields="*",
     start_date=None,
@@ -133,8 +145,218 @@ def get_timeseries(
         "raw_output": raw_output,
         "debug": debug,
     }
-    headers = {"Authorization": EIKON_SECRET_KEY}
-    response = http.get(
-        f"{EIKON_BASE_URL}/timeseries/{rics}/", headers=headers, params=payload
+    return f"{EIKON_BASE_URL}/timeseries/{rics}/", payload
+
+
+def operation_name(url):
+    return url[len(EIKON_BASE_URL) :].strip("/").split("/")[0]
+
+
+def split_timeseries(response):
+    """
+    Splits a normalized timeseries response of several RICs into the
+    responses each RIC would get if requested alone.
+
+    Returns
+    -------
+        dict
+            Responses by RIC, the RICs without data being left out.
+    """
+    data = response.get("data") if isinstance(response, dict) else None
+    if not isinstance(data, list):
+        return {}
+    rows_by_ric = {}
+    for record in data:
+        keys = {key.lower(): key for key in record}
+        day = record[keys["date"]]
+        rows = rows_by_ric.setdefault(record[keys["security"]], {})
+        rows.setdefault(day, {"Date": day})[record[keys["field"]]] = record[
+            keys["value"]
+        ]
+    return {
+        ric: {"data": [row for _, row in sorted(rows.items())], "error": None}
+        for ric, rows in rows_by_ric.items()
+    }
+
+
+def to_query(payload):
+    """
+    Encodes query parameters the way requests does: None values are dropped
+    and booleans are sent as True/False.
+    """
+    return {k: str(v) for k, v in payload.items() if v is not None}
+
+
+def get_client_loop():
+    """
+    Event loop running the calls of the synchronous functions, started on
+    first use in a daemon thread.
+    """
+    global client_loop  # pylint: disable=global-statement
+    with client_loop_lock:
+        if client_loop is None:
+            client_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=client_loop.run_forever, name="eikon", daemon=True
+            ).start()
+    return client_loop
+
+
+def get_client():
+    """
+    Session and semaphore of the running event loop.
+    """
+    loop = asyncio.get_event_loop()
+    client = clients.get(loop)
+    if client is None or client[0].closed:
+        connector = aiohttp.TCPConnector(
+            limit=EIKON_POOL_SIZE, ttl_dns_cache=300, keepalive_timeout=30
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=EIKON_CONNECT_TIMEOUT, sock_read=EIKON_READ_TIMEOUT
+        )
+        client = clients[loop] = (
+            aiohttp.ClientSession(connector=connector, timeout=timeout),
+            asyncio.Semaphore(EIKON_MAX_CONCURRENCY),
+        )
+    return client
+
+
+async def close_client():
+    client = clients.pop(asyncio.get_event_loop(), None)
+    if client is not None and not client[0].closed:
+        await client[0].close()
+
+
+async def close_async_session():
+    """
+    Closes the sessions of the running event loop and of the background one.
+    """
+    await close_client()
+    if client_loop is not None:
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(close_client(), client_loop)
+        )
+
+
+def is_throttled(response):
+    """
+    Detects the empty answers of the proxy when Eikon throttles.
+    """
+    return (
+        isinstance(response, dict)
+        and "data" in response
+        and response["data"] is None
+        and "error" in response
+        and response["error"] is None
     )
-    return response.json()
+
+
+async def attempt(url, payload):
+    session, semaphore = get_client()
+    headers = {"Authorization": EIKON_SECRET_KEY}
+    await limiter.aacquire()
+    async with semaphore:
+        UPSTREAM_CALLS.labels("eikon", operation_name(url)).inc()
+        async with session.get(
+            url, headers=headers, params=to_query(payload)
+        ) as response:
+            if response.status == TOO_MANY_REQUESTS:
+                limiter.throttled()
+            if response.status in RETRY_STATUSES:
+                response.raise_for_status()
+            return await response.json(content_type=None)
+
+
+async def hedged_attempt(url, payload):
+    """
+    Sends a call a second time if it has not answered after
+    `EIKON_HEDGE_DELAY` seconds, and returns the first answer.
+    """
+    first = asyncio.ensure_future(attempt(url, payload))
+    if EIKON_HEDGE_DELAY <= 0:
+        return await first
+    done, _ = await asyncio.wait({first}, timeout=EIKON_HEDGE_DELAY)
+    if len(done) > 0:
+        return first.result()
+    pending = {first, asyncio.ensure_future(attempt(url, payload))}
+    exception = None
+    try:
+        while len(pending) > 0:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                exception = task.exception()
+        raise exception
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def afetch(url, payload):
+    with timed("upstream"):
+        for retry in range(EIKON_RETRIES + 1):
+            try:
+                response = await hedged_attempt(url, payload)
+            except RETRYABLE_ERRORS:
+                if retry == EIKON_RETRIES:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2**retry)
+                continue
+            if not is_throttled(response):
+                limiter.succeeded()
+                return response
+            limiter.throttled()
+            # The limiter paces the next attempt at the lowered rate
+            if retry == EIKON_RETRIES:
+                return response
+
+
+def fetch(url, payload):
+    # The context is copied along with the call, so that its timings are
+    # reported on the request
+    future = asyncio.run_coroutine_threadsafe(afetch(url, payload), get_client_loop())
+    return future.result()
+
+
+def get_data(*args, **kwargs):
+    return fetch(*data_request(*args, **kwargs))
+
+
+def get_news_headlines(*args, **kwargs):
+    return fetch(*news_headlines_request(*args, **kwargs))
+
+
+def get_news_story(*args, **kwargs):
+    return fetch(*news_story_request(*args, **kwargs))
+
+
+def get_symbology(*args, **kwargs):
+    return fetch(*symbology_request(*args, **kwargs))
+
+
+def get_timeseries(*args, **kwargs):
+    return fetch(*timeseries_request(*args, **kwargs))
+
+
+async def aget_data(*args, **kwargs):
+    return await afetch(*data_request(*args, **kwargs))
+
+
+async def aget_news_headlines(*args, **kwargs):
+    return await afetch(*news_headlines_request(*args, **kwargs))
+
+
+async def aget_news_story(*args, **kwargs):
+    return await afetch(*news_story_request(*args, **kwargs))
+
+
+async def aget_symbology(*args, **kwargs):
+    return await afetch(*symbology_request(*args, **kwargs))
+
+
+async def aget_timeseries(*args, **kwargs):
+    return await afetch(*timeseries_request(*args, **kwargs))
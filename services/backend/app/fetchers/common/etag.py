@@ -0,0 +1,152 @@
+"""
+Entity tags of responses, derived from the versions of the cached objects
+they are computed from.
+"""
+from collections import OrderedDict
+import contextvars
+from datetime import date, datetime
+import hashlib
+import os
+import threading
+
+from .manifest import get_manifest
+from .storage import month_objects, should_refresh
+
+
+CLOSED_RANGE_MAX_AGE = int(os.getenv("CLOSED_RANGE_MAX_AGE", str(30 * 24 * 3600)))
+ETAG_MAX_KEYS = int(os.getenv("ETAG_MAX_KEYS", "10000"))
+
+dependencies = contextvars.ContextVar("dependencies", default=None)
+
+known_dependencies = OrderedDict()
+known_dependencies_lock = threading.Lock()
+
+
+def get_code_version():
+    """
+    Hashes the source code of the fetchers, unless CODE_VERSION is set.
+    """
+    code_version = os.getenv("CODE_VERSION")
+    if code_version is not None:
+        return code_version
+    fetchers_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(fetchers_path)):
+        for filename in sorted(files):
+            if filename.endswith(".py"):
+                with open(os.path.join(root, filename), "rb") as handler:
+                    digest.update(handler.read())
+    return digest.hexdigest()
+
+
+CODE_VERSION = get_code_version()
+
+
+def record_dependency(bucket_name, ric, start_date, end_date):
+    """
+    Records that the current request reads the months of a RIC in a bucket.
+    """
+    recorded = dependencies.get()
+    if recorded is not None:
+        recorded.append(
+            (
+                bucket_name,
+                ric,
+                start_date.isoformat()[:7],
+                end_date.isoformat()[:7],
+            )
+        )
+
+
+def remember_dependencies(key, recorded):
+    with known_dependencies_lock:
+        known_dependencies[key] = sorted(set(recorded))
+        known_dependencies.move_to_end(key)
+        while len(known_dependencies) > ETAG_MAX_KEYS:
+            known_dependencies.popitem(last=False)
+
+
+def get_known_dependencies(key):
+    with known_dependencies_lock:
+        return known_dependencies.get(key)
+
+
+def month_start(month):
+    return date(int(month[:4]), int(month[5:]), 1)
+
+
+def recorded_objects(manifest, ric, first_month, last_month):
+    return {
+        month: o
+        for month, o in month_objects(manifest.list(f"{ric}/")).items()
+        if first_month <= month <= last_month
+    }
+
+
+def is_refreshed(objects, last_month):
+    """
+    Tells if the last month of a range would be downloaded again, as
+    `cache_in_s3` does for a month saved before its end.
+    """
+    return last_month not in objects or should_refresh(
+        objects[last_month].last_modified, month_start(last_month), True
+    )
+
+
+def list_versions(recorded):
+    """
+    Lists the versions of the month objects a request depends on, from the
+    in-memory manifests so that tagging a response needs no call to Minio.
+
+    Returns
+    -------
+        tuple
+            A list of (object name, etag) and a boolean telling if every
+            month object is fresh, i.e. it would not be downloaded again.
+            The list is None while the manifest of a bucket is not loaded.
+    """
+    versions = []
+    is_fresh = True
+    for bucket_name, ric, first_month, last_month in recorded:
+        manifest = get_manifest(bucket_name)
+        if manifest is None:
+            return None, False
+        objects = recorded_objects(manifest, ric, first_month, last_month)
+        number_of_months = (int(last_month[:4]) - int(first_month[:4])) * 12 + (
+            int(last_month[5:]) - int(first_month[5:]) + 1
+        )
+        if len(objects) < number_of_months or is_refreshed(objects, last_month):
+            is_fresh = False
+        for month in sorted(objects):
+            cached = objects[month]
+            version = (f"{bucket_name}/{cached.object_name}", cached.etag)
+            # The months of a compacted year share the same object
+            if version not in versions:
+                versions.append(version)
+    return versions, is_fresh
+
+
+def compute_etag(key, versions):
+    digest = hashlib.sha256(CODE_VERSION.encode())
+    digest.update(key.encode())
+    for object_name, etag in versions:
+        digest.update(f"{object_name}:{etag}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def cache_control(recorded):
+    """
+    Closed months saved after their end never change: responses only made of
+    them can be kept long.
+    """
+    this_month = datetime.utcnow().date().isoformat()[:7]
+    for bucket_name, ric, first_month, last_month in recorded:
+        if last_month >= this_month:
+            return "no-cache"
+        manifest = get_manifest(bucket_name)
+        if manifest is None:
+            return "no-cache"
+        objects = recorded_objects(manifest, ric, first_month, last_month)
+        if is_refreshed(objects, last_month):
+            return "no-cache"
+    return f"public, max-age={CLOSED_RANGE_MAX_AGE}"
@@ -0,0 +1,224 @@
+"""
+Cache of computed factor frames, in memory and in Minio.
+
+A cached frame covers a date window. Any request inside that window is
+answered by slicing it; a request outside of it recomputes the union of both
+windows. Factors whose values depend on the start of the window (backtests,
+state machines) are cached by their exact window instead. A frame is valid as
+long as the month objects it was computed from have not been refreshed, which
+is read from the in-memory manifests. Frames are written to Minio in the
+background.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import functools
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .etag import CODE_VERSION, dependencies, list_versions
+from .minio import get_object_if_exists, make_bucket_if_not_exists, put_bytes
+
+
+FACTOR_CACHE_BUCKET = "factor-cache"
+FACTOR_CACHE_MAX_ENTRIES = int(os.getenv("FACTOR_CACHE_MAX_ENTRIES", "1000"))
+METADATA_KEY = b"factor_cache"
+
+entries = OrderedDict()
+entries_lock = threading.Lock()
+writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="factor-cache")
+
+
+class Entry:
+    def __init__(self, dfm, start_date, end_date, recorded, versions, computed_on):
+        self.dfm = dfm
+        self.start_date = start_date
+        self.end_date = end_date
+        self.recorded = recorded
+        self.versions = versions
+        self.computed_on = computed_on
+
+    def covers(self, start_date, end_date):
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def is_valid(self):
+        if len(self.recorded) == 0:
+            # Inputs are not tracked: trust closed windows, and recent ones
+            # for the day only
+            this_month = datetime.utcnow().date().replace(day=1)
+            return (
+                self.end_date.date() < this_month
+                or self.computed_on == datetime.utcnow().date()
+            )
+        versions, is_fresh = list_versions(self.recorded)
+        return is_fresh and versions == self.versions
+
+
+def entry_key(name, stem, start_date=None, end_date=None):
+    """
+    Key of an entry, with its window when the factor is cached by exact window.
+    """
+    if start_date is None:
+        return (name, stem)
+    return (name, stem, start_date.date().isoformat(), end_date.date().isoformat())
+
+
+def object_name(key):
+    name, stem = key[:2]
+    if len(key) == 2:
+        return f"{name}/{CODE_VERSION}/{stem}.parquet"
+    return f"{name}/{CODE_VERSION}/{stem}/{key[2]}_{key[3]}.parquet"
+
+
+def get_entry(key):
+    with entries_lock:
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+            return entry
+    content = get_object_if_exists(FACTOR_CACHE_BUCKET, object_name(key))
+    if content is None:
+        return None
+    table = pq.read_table(io.BytesIO(content))
+    metadata = json.loads(table.schema.metadata[METADATA_KEY])
+    dfm = table.to_pandas().set_index(["Date", "Stem"])
+    entry = Entry(
+        dfm,
+        datetime.fromisoformat(metadata["start_date"]),
+        datetime.fromisoformat(metadata["end_date"]),
+        [tuple(d) for d in metadata["recorded"]],
+        [tuple(v) for v in metadata["versions"]],
+        date.fromisoformat(metadata["computed_on"]),
+    )
+    set_entry(key, entry)
+    return entry
+
+
+def set_entry(key, entry):
+    with entries_lock:
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > FACTOR_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+
+
+def save_entry(key, entry):
+    metadata = {
+        "start_date": entry.start_date.isoformat(),
+        "end_date": entry.end_date.isoformat(),
+        "recorded": entry.recorded,
+        "versions": entry.versions,
+        "computed_on": entry.computed_on.isoformat(),
+    }
+    table = pa.Table.from_pandas(entry.dfm.reset_index(), preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)}
+    )
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    make_bucket_if_not_exists(FACTOR_CACHE_BUCKET)
+    put_bytes(buffer.getvalue(), FACTOR_CACHE_BUCKET, object_name(key))
+
+
+def save_entry_in_background(key, entry):
+    def save():
+        try:
+            save_entry(key, entry)
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Saving {object_name(key)} failed: {exception}")
+
+    writer.submit(save)
+
+
+def slice_dates(dfm, start_date, end_date):
+    dates = pd.to_datetime(dfm.index.get_level_values("Date"))
+    return dfm.loc[(dates >= start_date) & (dates <= end_date)]
+
+
+def invalidate(name=None, stem=None):
+    """
+    Drops in-memory entries, all of them by default.
+    """
+    with entries_lock:
+        for key in list(entries):
+            if (name is None or key[0] == name) and (stem is None or key[1] == stem):
+                del entries[key]
+
+
+def cache_factor(name, exact_window=False):
+    """
+    Parameters:
+    -----------
+    name: string
+        Name of the factor, as in its endpoint path (for example carry/bond)
+    exact_window: bool
+        True if the values depend on the start or the end of the window, so
+        that a frame only answers the window it was computed for
+    """
+
+    def decorator(func):
+        """
+        Parameters:
+        -----------
+        func: func(future, start_date, end_date)
+            Factor computation returning a tuple (pd.DataFrame, error message)
+        """
+
+        @functools.wraps(func)
+        def inner(future, start_date, end_date):
+            stem = future["Stem"]["Reuters"]
+            if exact_window:
+                key = entry_key(name, stem, start_date, end_date)
+            else:
+                key = entry_key(name, stem)
+            outer = dependencies.get()
+            entry = get_entry(key)
+            if entry is not None and not entry.is_valid():
+                entry = None
+            if entry is not None and entry.covers(start_date, end_date):
+                if outer is not None:
+                    outer.extend(entry.recorded)
+                return slice_dates(entry.dfm, start_date, end_date), None
+            window_start_date = start_date
+            window_end_date = end_date
+            if entry is not None:
+                window_start_date = min(start_date, entry.start_date)
+                window_end_date = max(end_date, entry.end_date)
+            recorded = []
+            token = dependencies.set(recorded)
+            try:
+                dfm, error_message = func(future, window_start_date, window_end_date)
+            finally:
+                dependencies.reset(token)
+            if outer is not None:
+                outer.extend(recorded)
+            if error_message is not None:
+                return None, error_message
+            recorded = sorted(set(recorded))
+            versions, _ = list_versions(recorded)
+            if versions is None:
+                # Not cached until the manifests are loaded, as it could not
+                # be validated
+                return slice_dates(dfm, start_date, end_date), None
+            entry = Entry(
+                dfm,
+                window_start_date,
+                window_end_date,
+                recorded,
+                versions,
+                datetime.utcnow().date(),
+            )
+            set_entry(key, entry)
+            save_entry_in_background(key, entry)
+            return slice_dates(dfm, start_date, end_date), None
+
+        inner.exact_window = exact_window
+        return inner
+
+    return decorator
@@ -0,0 +1,116 @@
+"""
+In-memory cache of formatted month partitions.
+
+Frames are kept ready to use, so that a hit skips the JSON decoding and the
+formatting of the month. The cache is bounded by the memory used by the
+frames rather than by a number of entries. Entries of the current month,
+which is still being updated, expire after `FRAME_CACHE_TTL` seconds.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import os
+import threading
+import time
+
+from .metrics import FRAME_CACHE_BYTES, FRAME_CACHE_ENTRIES, FRAME_CACHE_EVENTS
+from .storage import object_month
+
+
+FRAME_CACHE_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_BYTES", str(512 * 1024**2)))
+FRAME_CACHE_TTL = int(os.getenv("FRAME_CACHE_TTL", "300"))
+
+entries = OrderedDict()
+entries_lock = threading.Lock()
+total_size = 0
+
+
+class Entry:
+    def __init__(self, dfm, etag, size, expires_at):
+        self.dfm = dfm
+        self.etag = etag
+        self.size = size
+        self.expires_at = expires_at
+
+    def is_valid(self, etag=None):
+        if self.expires_at is not None and time.monotonic() > self.expires_at:
+            return False
+        return etag is None or self.etag is None or etag == self.etag
+
+
+def is_current_month(object_name):
+    return object_month(object_name) >= datetime.utcnow().date().isoformat()[:7]
+
+
+def frame_size(dfm):
+    return int(dfm.memory_usage(index=True, deep=True).sum())
+
+
+def remove(key):
+    global total_size  # pylint: disable=global-statement
+    entry = entries.pop(key)
+    total_size -= entry.size
+
+
+def update_gauges():
+    FRAME_CACHE_BYTES.set(total_size)
+    FRAME_CACHE_ENTRIES.set(len(entries))
+
+
+def get_frame(bucket_name, object_name, etag=None):
+    """
+    Parameters
+    ----------
+        bucket_name: string
+
+        object_name: string
+
+        etag: string
+            Etag of the object in Minio, when known: frames built from
+            another version of the object are dropped.
+
+    Returns
+    -------
+        pd.DataFrame
+            The cached frame, or None. It is shared: do not modify it.
+    """
+    key = (bucket_name, object_name)
+    with entries_lock:
+        entry = entries.get(key)
+        if entry is None:
+            FRAME_CACHE_EVENTS.labels("miss").inc()
+            return None
+        if not entry.is_valid(etag):
+            FRAME_CACHE_EVENTS.labels("expired").inc()
+            remove(key)
+            update_gauges()
+            return None
+        entries.move_to_end(key)
+    FRAME_CACHE_EVENTS.labels("hit").inc()
+    return entry.dfm
+
+
+def set_frame(bucket_name, object_name, dfm, etag=None):
+    global total_size  # pylint: disable=global-statement
+    size = frame_size(dfm)
+    if size > FRAME_CACHE_MAX_BYTES:
+        return
+    expires_at = None
+    if is_current_month(object_name):
+        expires_at = time.monotonic() + FRAME_CACHE_TTL
+    key = (bucket_name, object_name)
+    with entries_lock:
+        if key in entries:
+            remove(key)
+        entries[key] = Entry(dfm, etag, size, expires_at)
+        total_size += size
+        while total_size > FRAME_CACHE_MAX_BYTES:
+            remove(next(iter(entries)))
+            FRAME_CACHE_EVENTS.labels("eviction").inc()
+        update_gauges()
+
+
+def delete_frame(bucket_name, object_name):
+    with entries_lock:
+        if (bucket_name, object_name) in entries:
+            remove((bucket_name, object_name))
+            update_gauges()
@@ -0,0 +1,201 @@
+"""
+In-memory manifest of the objects of the cache buckets.
+
+The names, etags and modification dates of the objects are listed in the
+background every `MANIFEST_REFRESH_INTERVAL` seconds and updated on every
+write of the worker, so that deciding whether a month is cached and fresh
+needs no call to Minio. With `MANIFEST_NOTIFICATIONS=1`, the manifest also
+follows the bucket notifications of Minio, seeing the writes of the other
+workers at once. Until a bucket is listed, Minio is asked directly.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+import os
+import threading
+from urllib.parse import unquote_plus
+
+from .minio import (
+    list_objects,
+    listen_bucket_notification,
+    stat_object_if_exists,
+)
+
+
+MANIFEST_BUCKETS = [
+    bucket_name
+    for bucket_name in os.getenv(
+        "MANIFEST_BUCKETS",
+        "daily-dividend,daily-ohlcv,daily-risk-free-rate,health-ric",
+    ).split(",")
+    if bucket_name
+]
+MANIFEST_REFRESH_INTERVAL = int(os.getenv("MANIFEST_REFRESH_INTERVAL", "300"))
+MANIFEST_NOTIFICATIONS = os.getenv("MANIFEST_NOTIFICATIONS", "0") == "1"
+NOTIFICATION_EVENTS = ["s3:ObjectCreated:*", "s3:ObjectRemoved:*"]
+
+ObjectVersion = namedtuple("ObjectVersion", ["object_name", "etag", "last_modified"])
+
+manifests = {}
+stopped = threading.Event()
+
+
+def prefix_of(object_name):
+    return object_name.rsplit("/", 1)[0] + "/" if "/" in object_name else ""
+
+
+class Manifest:
+    def __init__(self, bucket_name):
+        self.bucket_name = bucket_name
+        self.lock = threading.Lock()
+        self.by_prefix = None
+        # Writes seen while the bucket is being listed, applied after it
+        self.changes = None
+
+    def is_loaded(self):
+        return self.by_prefix is not None
+
+    def list(self, prefix):
+        with self.lock:
+            return list(self.by_prefix.get(prefix, {}).values())
+
+    def get(self, object_name):
+        with self.lock:
+            return self.by_prefix.get(prefix_of(object_name), {}).get(object_name)
+
+    def apply(self, by_prefix, object_name, version):
+        objects = by_prefix.setdefault(prefix_of(object_name), {})
+        if version is None:
+            objects.pop(object_name, None)
+        else:
+            objects[object_name] = version
+
+    def update(self, object_name, version):
+        """
+        Records a write (or a removal if version is None) of an object.
+        """
+        with self.lock:
+            if self.changes is not None:
+                self.changes[object_name] = version
+            if self.by_prefix is not None:
+                self.apply(self.by_prefix, object_name, version)
+
+    def refresh(self):
+        with self.lock:
+            self.changes = {}
+        by_prefix = {}
+        try:
+            for obj in list_objects(self.bucket_name, recursive=True):
+                self.apply(
+                    by_prefix,
+                    obj.object_name,
+                    ObjectVersion(obj.object_name, obj.etag, obj.last_modified),
+                )
+        finally:
+            with self.lock:
+                changes, self.changes = self.changes, None
+        with self.lock:
+            for object_name, version in changes.items():
+                self.apply(by_prefix, object_name, version)
+            self.by_prefix = by_prefix
+
+
+def refresh_loop(manifest):
+    while not stopped.is_set():
+        try:
+            manifest.refresh()
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Listing {manifest.bucket_name} failed: {exception}")
+        stopped.wait(MANIFEST_REFRESH_INTERVAL)
+
+
+def notification_loop(manifest):
+    while not stopped.is_set():
+        try:
+            with listen_bucket_notification(
+                manifest.bucket_name, NOTIFICATION_EVENTS
+            ) as events:
+                for event in events:
+                    for record in event.get("Records", []):
+                        apply_notification(manifest, record)
+                    if stopped.is_set():
+                        return
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Notifications of {manifest.bucket_name} failed: {exception}")
+            stopped.wait(5)
+
+
+def apply_notification(manifest, record):
+    obj = record["s3"]["object"]
+    object_name = unquote_plus(obj["key"])
+    if record["eventName"].startswith("s3:ObjectRemoved"):
+        manifest.update(object_name, None)
+        return
+    last_modified = datetime.fromisoformat(record["eventTime"].replace("Z", "+00:00"))
+    version = ObjectVersion(object_name, obj.get("eTag"), last_modified)
+    manifest.update(object_name, version)
+
+
+def start_manifests():
+    """
+    Starts listing the manifest buckets in the background.
+    """
+    stopped.clear()
+    for bucket_name in MANIFEST_BUCKETS:
+        if bucket_name in manifests:
+            continue
+        manifest = manifests[bucket_name] = Manifest(bucket_name)
+        threading.Thread(target=refresh_loop, args=(manifest,), daemon=True).start()
+        if MANIFEST_NOTIFICATIONS:
+            threading.Thread(
+                target=notification_loop, args=(manifest,), daemon=True
+            ).start()
+
+
+def stop_manifests():
+    stopped.set()
+
+
+def get_manifest(bucket_name):
+    manifest = manifests.get(bucket_name)
+    if manifest is None or not manifest.is_loaded():
+        return None
+    return manifest
+
+
+def list_ric_objects(bucket_name, ric):
+    """
+    Lists the objects named {ric}/..., from the manifest when available.
+    """
+    manifest = get_manifest(bucket_name)
+    if manifest is None:
+        return list_objects(bucket_name, prefix=f"{ric}/")
+    return manifest.list(f"{ric}/")
+
+
+def find_object(bucket_name, object_name):
+    """
+    Returns
+    -------
+        The version (object_name, etag, last_modified) of an object, or None
+        if it does not exist.
+    """
+    manifest = get_manifest(bucket_name)
+    if manifest is None:
+        return stat_object_if_exists(bucket_name, object_name)
+    return manifest.get(object_name)
+
+
+def record_object(bucket_name, object_name, etag=None):
+    """
+    Records a write of the worker. Its modification date is taken as now.
+    """
+    manifest = manifests.get(bucket_name)
+    if manifest is not None:
+        version = ObjectVersion(object_name, etag, datetime.now(timezone.utc))
+        manifest.update(object_name, version)
+
+
+def record_removal(bucket_name, object_name):
+    manifest = manifests.get(bucket_name)
+    if manifest is not None:
+        manifest.update(object_name, None)
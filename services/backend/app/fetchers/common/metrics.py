@@ -0,0 +1,198 @@
+"""
+Request instrumentation: per-stage timings and Prometheus metrics.
+"""
+import asyncio
+from contextlib import contextmanager
+import contextvars
+import functools
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+REQUEST_DURATION = Histogram(
+    "data_server_request_duration_seconds",
+    "Duration of HTTP requests",
+    ["endpoint"],
+)
+STAGE_DURATION = Histogram(
+    "data_server_stage_duration_seconds",
+    "Time spent in each stage of HTTP requests",
+    ["endpoint", "stage"],
+)
+CACHE_LOOKUPS = Counter(
+    "data_server_cache_lookups_total",
+    "Month partitions by the tier that served them",
+    ["bucket", "tier"],
+)
+S3_CALLS = Counter(
+    "data_server_s3_calls_total",
+    "Calls to Minio",
+    ["operation"],
+)
+FRAME_CACHE_EVENTS = Counter(
+    "data_server_frame_cache_events_total",
+    "Hits, misses, expirations and evictions of the in-memory frame cache",
+    ["event"],
+)
+FRAME_CACHE_BYTES = Gauge(
+    "data_server_frame_cache_bytes",
+    "Memory used by the frames of the in-memory frame cache",
+    multiprocess_mode="livesum",
+)
+FRAME_CACHE_ENTRIES = Gauge(
+    "data_server_frame_cache_entries",
+    "Number of frames in the in-memory frame cache",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_CALLS = Counter(
+    "data_server_upstream_calls_total",
+    "Calls to upstream data providers",
+    ["provider", "operation"],
+)
+UPSTREAM_THROTTLES = Counter(
+    "data_server_upstream_throttles_total",
+    "Calls throttled by upstream data providers",
+    ["provider"],
+)
+UPSTREAM_RATE = Gauge(
+    "data_server_upstream_rate",
+    "Calls per second to upstream data providers allowed by the rate limiter",
+    ["provider"],
+    multiprocess_mode="max",
+)
+
+endpoint = contextvars.ContextVar("endpoint", default="")
+timings = contextvars.ContextVar("timings", default=None)
+timings_lock = threading.Lock()
+
+
+def start_timings(name):
+    """
+    Starts collecting the stage timings of a request.
+
+    Parameters
+    ----------
+        name: string
+            Route template of the request, label of the stage metrics.
+
+    Returns
+    -------
+        dict
+            Intervals (start, end) by stage, filled as the request runs.
+    """
+    endpoint.set(name)
+    collected = {}
+    timings.set(collected)
+    return collected
+
+
+def add_timing(stage, start, end):
+    STAGE_DURATION.labels(endpoint.get(), stage).observe(end - start)
+    collected = timings.get()
+    if collected is not None:
+        with timings_lock:
+            collected.setdefault(stage, []).append((start, end))
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(stage, start, time.perf_counter())
+
+
+def timed_function(stage, counter=None):
+    """
+    Decorator timing every call of a function, coroutine functions included.
+
+    Parameters
+    ----------
+        stage: string
+        counter: prometheus_client.Counter
+            Incremented on every call, labels already applied.
+    """
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def ainner(*args, **kwargs):
+                if counter is not None:
+                    counter.inc()
+                with timed(stage):
+                    return await func(*args, **kwargs)
+
+            return ainner
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if counter is not None:
+                counter.inc()
+            with timed(stage):
+                return func(*args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+def wall_clock_duration(intervals):
+    """
+    Seconds covered by intervals (start, end), overlapping ones counted once.
+    """
+    duration = 0
+    covered_until = None
+    for start, end in sorted(intervals):
+        if covered_until is not None:
+            start = max(start, covered_until)
+        if end > start:
+            duration += end - start
+        covered_until = end if covered_until is None else max(covered_until, end)
+    return duration
+
+
+def server_timing(collected, total):
+    """
+    Formats stage timings as a Server-Timing header value.
+
+    The duration of a stage is the wall-clock time during which at least one
+    call of the stage was running, so that concurrent calls (the months of a
+    range being fetched at once) are not summed.
+    """
+    with timings_lock:
+        collected = {stage: list(intervals) for stage, intervals in collected.items()}
+    metrics = [
+        f"{stage};dur={wall_clock_duration(intervals) * 1000:.1f}"
+        for stage, intervals in sorted(collected.items())
+    ]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def export_metrics():
+    """
+    Returns
+    -------
+        tuple
+            The metrics in the Prometheus text format and its content type.
+            Metrics of all workers are aggregated when
+            PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
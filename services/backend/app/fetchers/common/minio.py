@@ -1,16 +1,51 @@
+import io
 import os
 
+import certifi
 from minio import Minio
-
+from miniopy_async import Minio as AsyncMinio
+import urllib3
+
+from .metrics import S3_CALLS, timed_function
+
+
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT") or os.getenv("DATA_DOMAIN") + ":9000"
+MINIO_SECURE = os.getenv("MINIO_SECURE", "1") == "1"
+MINIO_POOL_SIZE = int(os.getenv("MINIO_POOL_SIZE", "32"))
+MINIO_TIMEOUT = float(os.getenv("MINIO_TIMEOUT", "30"))
+
+# Connections are kept alive and shared by the threads of the worker: the
+# pool is sized for the batch and month fetching pools rather than the
+# default 10 connections of the Minio client.
+http_client = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=MINIO_POOL_SIZE,
+    block=False,
+    timeout=urllib3.Timeout(connect=5, read=MINIO_TIMEOUT),
+    cert_reqs="CERT_REQUIRED",
+    ca_certs=os.getenv("SSL_CERT_FILE") or certifi.where(),
+    retries=urllib3.Retry(
+        total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+    ),
+)
 
 client = Minio(
-    os.getenv("DATA_DOMAIN") + ":9000",
+    MINIO_ENDPOINT,
     access_key=os.getenv("MINIO_ROOT_USER"),
     secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
-    secure=True,
+    secure=MINIO_SECURE,
+    http_client=http_client,
+)
+
+async_client = AsyncMinio(
+    MINIO_ENDPOINT,
+    access_key=os.getenv("MINIO_ROOT_USER"),
+    secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
+    secure=MINIO_SECURE,
 )
 
 
+@timed_function("s3-copy", S3_CALLS.labels("copy"))
 def copy_object(
     bucket_name,
     object_name,
@@ -25,6 +60,7 @@ def copy_object(
     )
 
 
+@timed_function("s3-head", S3_CALLS.labels("head"))
 def exists_object(bucket_name, object_name):
     try:
         client.stat_object(bucket_name, object_name)
@@ -33,12 +69,19 @@ def exists_object(bucket_name, object_name):
         return False
 
 
+@timed_function("s3-head", S3_CALLS.labels("head"))
+def exists_bucket(bucket_name):
+    return client.bucket_exists(bucket_name)
+
+
+@timed_function("s3-list-buckets", S3_CALLS.labels("list-buckets"))
 def make_bucket_if_not_exists(bucket_name):
     buckets = client.list_buckets()
     if bucket_name not in [b.name for b in buckets]:
         client.make_bucket(bucket_name)
 
 
+@timed_function("s3-put", S3_CALLS.labels("put"))
 def put_object(path, bucket_name, object_name=None):
     file_stat = os.stat(path)
     object_name = os.path.basename(path) if not object_name else object_name
@@ -52,17 +95,155 @@ def put_object(path, bucket_name, object_name=None):
         )
 
 
+@timed_function("s3-list", S3_CALLS.labels("list"))
 def list_object_names(bucket_name):
     return [o.object_name for o in client.list_objects(bucket_name)]
 
 
+@timed_function("s3-list", S3_CALLS.labels("list"))
+def list_objects(bucket_name, prefix=None, recursive=False):
+    return list(client.list_objects(bucket_name, prefix=prefix, recursive=recursive))
+
+
+@timed_function("s3-get", S3_CALLS.labels("get"))
+def get_object(bucket_name, object_name):
+    response = client.get_object(bucket_name, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def is_missing(exception):
+    return getattr(exception, "code", None) in ["NoSuchKey", "NoSuchBucket"]
+
+
+@timed_function("s3-get", S3_CALLS.labels("get"))
+def get_object_if_exists(bucket_name, object_name):
+    """
+    Returns
+    -------
+        bytes
+            The content of the object, or None if it does not exist.
+    """
+    try:
+        response = client.get_object(bucket_name, object_name)
+    except Exception as exception:  # pylint: disable=broad-except
+        if is_missing(exception):
+            return None
+        raise
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+@timed_function("s3-put", S3_CALLS.labels("put"))
+def put_bytes(content, bucket_name, object_name):
+    return client.put_object(
+        bucket_name,
+        object_name,
+        io.BytesIO(content),
+        len(content),
+        "application/octet-stream",
+    )
+
+
+@timed_function("s3-get", S3_CALLS.labels("get"))
 def fget_object(bucket_name, object_name, file_path):
     return client.fget_object(bucket_name, object_name, file_path)
 
 
+def listen_bucket_notification(bucket_name, events):
+    return client.listen_bucket_notification(bucket_name, events=events)
+
+
+@timed_function("s3-remove", S3_CALLS.labels("remove"))
 def remove_object(bucket_name, object_name):
     return client.remove_object(bucket_name, object_name)
 
 
+@timed_function("s3-head", S3_CALLS.labels("head"))
 def stat_object(bucket_name, object_name):
     return client.stat_object(bucket_name, object_name)
+
+
+@timed_function("s3-head", S3_CALLS.labels("head"))
+def stat_object_if_exists(bucket_name, object_name):
+    try:
+        return client.stat_object(bucket_name, object_name)
+    except:  # pylint: disable=bare-except
+        return None
+
+
+@timed_function("s3-head", S3_CALLS.labels("head"))
+async def aexists_object(bucket_name, object_name):
+    try:
+        await async_client.stat_object(bucket_name, object_name)
+        return True
+    except:  # pylint: disable=bare-except
+        return False
+
+
+@timed_function("s3-get", S3_CALLS.labels("get"))
+async def aget_object(bucket_name, object_name):
+    response = await async_client.get_object(bucket_name, object_name)
+    try:
+        return await response.read()
+    finally:
+        response.release()
+
+
+@timed_function("s3-get", S3_CALLS.labels("get"))
+async def aget_object_if_exists(bucket_name, object_name):
+    """
+    Asynchronous `get_object_if_exists`.
+    """
+    try:
+        response = await async_client.get_object(bucket_name, object_name)
+    except Exception as exception:  # pylint: disable=broad-except
+        if is_missing(exception):
+            return None
+        raise
+    try:
+        return await response.read()
+    finally:
+        response.release()
+
+
+@timed_function("s3-list-buckets", S3_CALLS.labels("list-buckets"))
+async def amake_bucket_if_not_exists(bucket_name):
+    buckets = await async_client.list_buckets()
+    if bucket_name not in [b.name for b in buckets]:
+        await async_client.make_bucket(bucket_name)
+
+
+@timed_function("s3-put", S3_CALLS.labels("put"))
+async def aput_object(content, bucket_name, object_name):
+    return await async_client.put_object(
+        bucket_name,
+        object_name,
+        io.BytesIO(content),
+        len(content),
+        "application/octet-stream",
+    )
+
+
+@timed_function("s3-remove", S3_CALLS.labels("remove"))
+async def aremove_object(bucket_name, object_name):
+    return await async_client.remove_object(bucket_name, object_name)
+
+
+@timed_function("s3-head", S3_CALLS.labels("head"))
+async def astat_object(bucket_name, object_name):
+    return await async_client.stat_object(bucket_name, object_name)
+
+
+@timed_function("s3-head", S3_CALLS.labels("head"))
+async def astat_object_if_exists(bucket_name, object_name):
+    try:
+        return await async_client.stat_object(bucket_name, object_name)
+    except:  # pylint: disable=bare-except
+        return None
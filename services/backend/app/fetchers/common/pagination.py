@@ -0,0 +1,103 @@
+"""
+Column projection and cursor pagination of date-indexed frames.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+def project(dfm: pd.DataFrame, fields=None):
+    """
+    Keeps only some columns, index levels are always kept.
+
+    Returns
+    -------
+        tuple
+            The projected frame and an error message.
+    """
+    if not fields:
+        return dfm, None
+    unknown_fields = [field for field in fields if field not in dfm.columns]
+    if len(unknown_fields) > 0:
+        return None, f"Unknown fields: {', '.join(unknown_fields)}"
+    return dfm[list(dict.fromkeys(fields))], None
+
+
+def get_dates(dfm: pd.DataFrame):
+    if isinstance(dfm.index, pd.MultiIndex):
+        return pd.to_datetime(dfm.index.get_level_values("Date"))
+    return pd.to_datetime(dfm.index)
+
+
+def page_start_date(start_date: datetime, after: str = None):
+    """
+    First date to fetch for a page starting after a cursor.
+    """
+    if after is None:
+        return start_date
+    return max(start_date, datetime.strptime(after[:10], "%Y-%m-%d") + timedelta(1))
+
+
+def paginate(dfm: pd.DataFrame, limit: int = None, after: str = None):
+    """
+    Keeps the first `limit` dates strictly after the `after` cursor.
+
+    All the rows of a date are in the same page, so that the last date of a
+    page can be used as the cursor of the next one.
+
+    Returns
+    -------
+        tuple
+            The page and the cursor of the next page, None if it is the last.
+    """
+    dfm = dfm.sort_index()
+    dates = get_dates(dfm)
+    if after is not None:
+        is_after = dates.normalize() > pd.Timestamp(after[:10])
+        dfm = dfm.loc[is_after]
+        dates = dates[is_after]
+    if limit is None:
+        return dfm, None
+    unique_dates = dates.unique()
+    if len(unique_dates) <= limit:
+        return dfm, None
+    last_date = unique_dates[limit - 1]
+    return dfm.loc[dates <= last_date], pd.Timestamp(last_date).date().isoformat()
+
+
+async def acollect_frames(frames, limit: int = None):
+    """
+    Reads frames from an async iterator until more than `limit` dates are
+    collected, so that a page can be built without reading the whole range.
+
+    Returns
+    -------
+        tuple
+            The concatenated frame and an error message.
+    """
+    collected = []
+    number_of_dates = 0
+    async for dfm, error_message in frames:
+        if error_message is not None:
+            return None, error_message
+        collected.append(dfm)
+        number_of_dates += len(get_dates(dfm).unique())
+        if limit is not None and number_of_dates > limit:
+            await frames.aclose()
+            break
+    if len(collected) == 0:
+        return None, "No data"
+    return pd.concat(collected), None
+
+
+async def aproject_frames(frames, fields=None):
+    """
+    Projects every frame of an async iterator of (frame, error message).
+    """
+    async for dfm, error_message in frames:
+        if error_message is None:
+            dfm, error_message = project(dfm, fields)
+        yield dfm, error_message
+        if error_message is not None:
+            await frames.aclose()
+            return
@@ -0,0 +1,130 @@
+"""
+Rate limiting of upstream calls, shared by the workers of a node.
+
+The limiter is a token bucket kept in a small file and updated under a lock
+file. Callers reserve a token and sleep until it is available, so that they
+queue rather than fail. The rate adapts to upstream: it is halved every time
+upstream throttles and grows back by a step on every success, up to the
+configured quota.
+"""
+import asyncio
+from contextlib import contextmanager
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .metrics import UPSTREAM_RATE, UPSTREAM_THROTTLES
+
+
+MIN_RATE_FRACTION = 0.05
+RATE_STEP_FRACTION = 0.05
+# Tokens, time of the last update and current rate
+STATE = struct.Struct("ddd")
+
+
+class RateLimiter:
+    def __init__(self, provider, path, rate, burst):
+        """
+        Parameters
+        ----------
+            provider: string
+                Label of the metrics
+            path: string
+                File holding the state shared by the workers
+            rate: float
+                Quota, in calls per second
+            burst: float
+                Calls allowed at once after an idle period
+        """
+        self.provider = provider
+        self.path = path
+        self.max_rate = rate
+        self.min_rate = rate * MIN_RATE_FRACTION
+        self.burst = burst
+        self.lock = threading.Lock()
+        # State of the process when lock files are not available
+        self.state = None
+        UPSTREAM_RATE.labels(provider).set(rate)
+
+    def initial_state(self):
+        return [self.burst, time.time(), self.max_rate]
+
+    @contextmanager
+    def locked_state(self):
+        """
+        Yields the state [tokens, updated at, rate], written back on exit.
+        """
+        with self.lock:
+            if fcntl is None:
+                if self.state is None:
+                    self.state = self.initial_state()
+                yield self.state
+                return
+            # Opened on every call: a descriptor inherited by forked workers
+            # would share its lock with them
+            handle = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                content = os.pread(handle, STATE.size, 0)
+                if len(content) == STATE.size:
+                    state = list(STATE.unpack(content))
+                else:
+                    state = self.initial_state()
+                yield state
+                os.pwrite(handle, STATE.pack(*state), 0)
+            finally:
+                os.close(handle)
+
+    def refill(self, state):
+        tokens, updated_at, rate = state
+        now = time.time()
+        tokens = min(self.burst, tokens + max(0, now - updated_at) * rate)
+        state[:] = [tokens, now, rate]
+
+    def reserve(self):
+        """
+        Takes a token, the bucket going negative when callers are queued.
+
+        Returns
+        -------
+            float
+                Seconds to wait before calling upstream.
+        """
+        with self.locked_state() as state:
+            self.refill(state)
+            state[0] -= 1
+            tokens, _, rate = state
+        return max(0.0, -tokens / rate)
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    async def aacquire(self):
+        await asyncio.sleep(self.reserve())
+
+    def throttled(self):
+        """
+        Halves the rate, and drops the tokens left so that no burst follows.
+        """
+        UPSTREAM_THROTTLES.labels(self.provider).inc()
+        with self.locked_state() as state:
+            self.refill(state)
+            state[0] = min(state[0], 0)
+            state[2] = max(self.min_rate, state[2] / 2)
+            rate = state[2]
+        UPSTREAM_RATE.labels(self.provider).set(rate)
+
+    def succeeded(self):
+        with self.locked_state() as state:
+            if state[2] >= self.max_rate:
+                return
+            self.refill(state)
+            state[2] = min(self.max_rate, state[2] + self.max_rate * RATE_STEP_FRACTION)
+            rate = state[2]
+        UPSTREAM_RATE.labels(self.provider).set(rate)
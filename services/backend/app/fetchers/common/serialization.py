@@ -0,0 +1,219 @@
+"""
+Serialization of data frames exchanged over the REST API.
+"""
+import io
+import json
+import os
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+ARROW = "arrow"
+JSON = "json"
+MSGPACK = "msgpack"
+NDJSON = "ndjson"
+PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    ARROW: "application/vnd.apache.arrow.stream",
+    JSON: "application/json",
+    MSGPACK: "application/msgpack",
+    NDJSON: "application/x-ndjson",
+    PARQUET: "application/vnd.apache.parquet",
+}
+
+NDJSON_CHUNK_SIZE = int(os.getenv("NDJSON_CHUNK_SIZE", "1000"))
+
+
+def media_type_to_format(media_type: str):
+    """
+    Finds the serialization format matching a media type.
+
+    Parameters
+    ----------
+        media_type: string
+            For example the value of a Content-Type header.
+
+    Returns
+    -------
+        string
+            The format, or None if the media type is not supported.
+    """
+    media_type = media_type.split(";")[0].strip().lower()
+    for media_format, value in MEDIA_TYPES.items():
+        if value == media_type:
+            return media_format
+    return None
+
+
+def negotiate_format(media_format: str = None, accept: str = None):
+    """
+    Picks the response format from a `format` parameter or an Accept header.
+
+    Parameters
+    ----------
+        media_format: string
+            Explicit format requested by the client, takes precedence.
+        accept: string
+            Value of the Accept header.
+
+    Returns
+    -------
+        string
+            The format, or None if nothing acceptable was requested.
+    """
+    if media_format is not None:
+        media_format = media_format.lower()
+        return media_format if media_format in MEDIA_TYPES else None
+    if accept is None:
+        return JSON
+    for media_type in accept.split(","):
+        media_type = media_type.split(";")[0].strip().lower()
+        if media_type in ["*/*", "application/*"]:
+            return JSON
+        media_format = media_type_to_format(media_type)
+        if media_format is not None:
+            return media_format
+    return None
+
+
+def dataframe_to_records(dfm: pd.DataFrame):
+    """
+    Converts a data frame to JSON-compatible records, NaN and inf becoming None.
+    """
+    return (
+        dfm.reset_index()
+        .replace({np.inf: np.nan, -np.inf: np.nan})
+        .replace({np.nan: None})
+        .to_dict(orient="records")
+    )
+
+
+def json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def dataframe_to_ndjson(dfm: pd.DataFrame, chunk_size=NDJSON_CHUNK_SIZE):
+    """
+    Serializes a data frame to newline-delimited JSON records.
+
+    Parameters
+    ----------
+        dfm: pd.DataFrame
+        chunk_size: int
+            Number of rows encoded at once.
+
+    Yields
+    ------
+        bytes
+            One chunk of lines at a time.
+    """
+    for start in range(0, dfm.shape[0], chunk_size):
+        records = dataframe_to_records(dfm.iloc[start : start + chunk_size])
+        yield "".join(
+            json.dumps(record, default=json_default) + "\n" for record in records
+        ).encode()
+
+
+def error_line(error_message):
+    return (json.dumps({"data": None, "error": error_message}) + "\n").encode()
+
+
+async def aframes_to_ndjson(frames):
+    """
+    Serializes data frames to newline-delimited JSON as they are produced.
+
+    Parameters
+    ----------
+        frames: async iterator
+            Yields tuples (pd.DataFrame, error message). An error is sent as a
+            last line {"data": null, "error": ...} and ends the stream, as is
+            "No data" when no row was sent.
+
+    Yields
+    ------
+        bytes
+    """
+    is_empty = True
+    async for dfm, error_message in frames:
+        if error_message is not None:
+            yield error_line(error_message)
+            return
+        for chunk in dataframe_to_ndjson(dfm):
+            is_empty = False
+            yield chunk
+    if is_empty:
+        yield error_line("No data")
+
+
+def dataframe_to_bytes(dfm: pd.DataFrame, media_format: str):
+    """
+    Serializes a data frame to a binary format, index levels becoming columns.
+
+    NaN and inf values are kept as they are.
+
+    Parameters
+    ----------
+        dfm: pd.DataFrame
+        media_format: string
+            Either: arrow, msgpack, parquet
+
+    Returns
+    -------
+        bytes
+    """
+    dfm = dfm.reset_index()
+    if media_format == ARROW:
+        table = pa.Table.from_pandas(dfm, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_format == PARQUET:
+        buffer = io.BytesIO()
+        dfm.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    if media_format == MSGPACK:
+        columns = {}
+        for column in dfm.columns:
+            series = dfm[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                series = series.dt.strftime("%Y-%m-%dT%H:%M:%S")
+            columns[str(column)] = series.tolist()
+        return msgpack.packb({"data": columns, "error": None})
+    raise ValueError(f"Unsupported format {media_format}")
+
+
+def bytes_to_dataframe(content: bytes, media_format: str):
+    """
+    Deserializes a payload produced by `dataframe_to_bytes`.
+
+    Parameters
+    ----------
+        content: bytes
+        media_format: string
+            Either: arrow, msgpack, parquet
+
+    Returns
+    -------
+        pd.DataFrame
+    """
+    if media_format == ARROW:
+        with pa.ipc.open_stream(content) as reader:
+            return reader.read_pandas()
+    if media_format == PARQUET:
+        return pd.read_parquet(io.BytesIO(content))
+    if media_format == MSGPACK:
+        response = msgpack.unpackb(content)
+        dfm = pd.DataFrame(response["data"])
+        if "Date" in dfm.columns:
+            dfm["Date"] = pd.to_datetime(dfm["Date"])
+        return dfm
+    raise ValueError(f"Unsupported format {media_format}")
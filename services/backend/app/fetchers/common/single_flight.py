@@ -0,0 +1,174 @@
+"""
+Coalescing of concurrent computations of the same key.
+
+Concurrent callers of the same key share the result of a single call: the
+first one runs it while the others wait. Callers in other workers of the node
+are serialized with a lock file, and can tell they waited for it so as to
+look for the result of the worker that held it.
+"""
+import asyncio
+from contextlib import contextmanager
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+SINGLE_FLIGHT_LOCK_DIR = os.getenv(
+    "SINGLE_FLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "data-server-locks")
+)
+LOCK_POLL_INTERVAL = 0.05
+
+flights = {}
+flights_lock = threading.Lock()
+aflights = {}
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+def lock_path(key):
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return os.path.join(SINGLE_FLIGHT_LOCK_DIR, f"{digest}.lock")
+
+
+def open_lock_file(key):
+    if fcntl is None:
+        return None
+    os.makedirs(SINGLE_FLIGHT_LOCK_DIR, exist_ok=True)
+    return os.open(lock_path(key), os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def try_lock(handle):
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def unlock(handle):
+    if handle is not None:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        os.close(handle)
+
+
+@contextmanager
+def file_lock(key):
+    """
+    Holds the lock file of a key.
+
+    Yields
+    ------
+        bool
+            True if another worker was holding the lock.
+    """
+    handle = open_lock_file(key)
+    waited = False
+    try:
+        if handle is not None and not try_lock(handle):
+            waited = True
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield waited
+    finally:
+        unlock(handle)
+
+
+async def afile_lock(key):
+    """
+    Asynchronous `file_lock`, polling the lock so that waiting does not block
+    the event loop and can be cancelled.
+
+    Returns
+    -------
+        tuple
+            The handle to pass to `unlock` and whether another worker was
+            holding the lock.
+    """
+    handle = open_lock_file(key)
+    if handle is None:
+        return None, False
+    waited = False
+    try:
+        while not try_lock(handle):
+            waited = True
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+    except BaseException:
+        os.close(handle)
+        raise
+    return handle, waited
+
+
+def run_once(key, func):
+    """
+    Runs func(waited) once for all the concurrent callers of a key.
+
+    Parameters
+    ----------
+        key: tuple
+            For example (bucket name, object name)
+        func: func(waited)
+            Called while holding the lock file of the key, waited telling if
+            another worker was holding it.
+
+    Returns
+    -------
+        The result of func, shared by all callers: do not modify it.
+    """
+    with flights_lock:
+        flight = flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = flights[key] = Flight()
+    if not is_leader:
+        flight.done.wait()
+        if flight.exception is not None:
+            raise flight.exception
+        return flight.result
+    try:
+        with file_lock(key) as waited:
+            flight.result = func(waited)
+    except BaseException as exception:
+        flight.exception = exception
+        raise
+    finally:
+        with flights_lock:
+            del flights[key]
+        flight.done.set()
+    return flight.result
+
+
+async def arun_once(key, func):
+    """
+    Asynchronous `run_once`, func(waited) being a coroutine function.
+    Callers are coalesced within the event loop.
+    """
+    future = aflights.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+    future = asyncio.get_event_loop().create_future()
+    aflights[key] = future
+    try:
+        handle, waited = await afile_lock(key)
+        try:
+            result = await func(waited)
+        finally:
+            unlock(handle)
+        future.set_result(result)
+    except BaseException as exception:
+        future.set_exception(exception)
+        # Retrieved here so that an exception nobody waits for is not logged
+        future.exception()
+        raise
+    finally:
+        del aflights[key]
+    return result
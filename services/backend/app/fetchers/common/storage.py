@@ -0,0 +1,150 @@
+"""
+Columnar storage format of the cached month objects.
+
+Months are stored formatted, as zstd-compressed Parquet objects named
+{ric}/{YYYY-MM}.parquet, the version of the layout being kept in the schema
+metadata. Objects written before, {ric}/{YYYY-MM}.json, are still read.
+Closed years can be compacted into a single {ric}/{YYYY}.parquet object.
+"""
+from datetime import datetime, timedelta
+import io
+import json
+import os
+import re
+
+from dateutil.relativedelta import relativedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .metrics import timed
+
+
+FORMAT_VERSION = 1
+METADATA_KEY = b"data_server"
+JSON_SUFFIX = ".json"
+PARQUET_SUFFIX = ".parquet"
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}\.(json|parquet)$")
+YEAR_PATTERN = re.compile(r"^\d{4}\.parquet$")
+
+
+def object_month(object_name):
+    """
+    Extracts the month (YYYY-MM) of an object named {ric}/{YYYY-MM}.json or
+    {ric}/{YYYY-MM}.parquet.
+    """
+    return os.path.basename(object_name)[:7]
+
+
+def is_month_object(object_name):
+    return MONTH_PATTERN.match(os.path.basename(object_name)) is not None
+
+
+def is_year_object(object_name):
+    return YEAR_PATTERN.match(os.path.basename(object_name)) is not None
+
+
+def year_name(ric, year):
+    return f"{ric}/{year}{PARQUET_SUFFIX}"
+
+
+def month_end(month_start_date):
+    return month_start_date + relativedelta(months=1) - timedelta(days=1)
+
+
+def should_refresh(last_modified, month_start_date, is_last_month):
+    """
+    Tells if a cached month object must be downloaded again: only the last
+    month of a range is, when it was saved before the end of the month and
+    not yet today.
+    """
+    if not is_last_month:
+        return False
+    saved_on = last_modified.date()
+    return saved_on != datetime.utcnow().date() and saved_on <= month_end(
+        month_start_date
+    )
+
+
+def month_objects(objects):
+    """
+    Maps months to the objects holding them.
+
+    When a month is stored in several formats, the object written last holds
+    its data. The months of a compacted year map to the year object, unless
+    one of its month objects was written after it.
+    """
+    months = {}
+    years = {}
+    for obj in objects:
+        if is_year_object(obj.object_name):
+            years[os.path.basename(obj.object_name)[:4]] = obj
+        elif is_month_object(obj.object_name):
+            month = object_month(obj.object_name)
+            if month not in months or obj.last_modified > months[month].last_modified:
+                months[month] = obj
+    for year, year_object in years.items():
+        is_outdated = any(
+            month[:4] == year and obj.last_modified > year_object.last_modified
+            for month, obj in months.items()
+        )
+        if not is_outdated:
+            for month in range(1, 13):
+                months[f"{year}-{month:02d}"] = year_object
+    return months
+
+
+def is_parquet(object_name):
+    return object_name.endswith(PARQUET_SUFFIX)
+
+
+def parquet_name(object_name):
+    """
+    Name of the Parquet object holding the same data as a JSON (or Parquet)
+    object.
+    """
+    if object_name.endswith(PARQUET_SUFFIX):
+        return object_name
+    if object_name.endswith(JSON_SUFFIX):
+        object_name = object_name[: -len(JSON_SUFFIX)]
+    return object_name + PARQUET_SUFFIX
+
+
+def json_name(object_name):
+    """
+    Name of the JSON object holding the same data as a Parquet (or JSON)
+    object.
+    """
+    if object_name.endswith(JSON_SUFFIX):
+        return object_name
+    if object_name.endswith(PARQUET_SUFFIX):
+        object_name = object_name[: -len(PARQUET_SUFFIX)]
+    return object_name + JSON_SUFFIX
+
+
+def frame_to_parquet(dfm):
+    """
+    Raises
+    ------
+        pa.ArrowException
+            If the frame cannot be represented in Arrow, for example because
+            of columns of mixed types.
+    """
+    with timed("parquet-encode"):
+        table = pa.Table.from_pandas(dfm)
+        metadata = {"format_version": FORMAT_VERSION}
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)}
+        )
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression="zstd")
+        return buffer.getvalue()
+
+
+def parquet_to_frame(content):
+    with timed("parquet-decode"):
+        table = pq.read_table(pa.BufferReader(content))
+        metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, "{}"))
+        format_version = metadata.get("format_version")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported storage format version {format_version}")
+        return table.to_pandas()
@@ -0,0 +1,119 @@
+"""
+Compaction of the months of closed years into one object per RIC and year.
+
+Usage: python -m app.fetchers.compact [--workers 16] [--delete] [bucket ...]
+"""
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import os
+
+import pandas as pd
+
+from .common.cache import decode_month, month_end, safe_concat
+from .common.minio import get_object, list_objects, put_bytes, remove_object
+from .common.storage import (
+    frame_to_parquet,
+    is_month_object,
+    is_year_object,
+    month_objects,
+    year_name,
+)
+from .migrate import FORMATTERS
+
+
+MONTHLY_BUCKETS = ["daily-dividend", "daily-ohlcv", "daily-risk-free-rate"]
+
+
+def list_closed_years(bucket_name):
+    """
+    Lists the closed years whose twelve months are cached and complete, and
+    which are not compacted yet.
+
+    Returns
+    -------
+        list
+            Tuples (RIC, year, month objects).
+    """
+    objects_by_ric = defaultdict(list)
+    for obj in list_objects(bucket_name, recursive=True):
+        if is_month_object(obj.object_name) or is_year_object(obj.object_name):
+            objects_by_ric[os.path.dirname(obj.object_name)].append(obj)
+    this_year = date.today().year
+    closed_years = []
+    for ric, objects in sorted(objects_by_ric.items()):
+        months = month_objects(objects)
+        for year in sorted({month[:4] for month in months}):
+            if int(year) >= this_year:
+                continue
+            month_start_dates = [date(int(year), month, 1) for month in range(1, 13)]
+            year_months = [months.get(d.isoformat()[:7]) for d in month_start_dates]
+            # Months saved before their end may miss their last days
+            is_complete = all(
+                obj is not None
+                and not is_year_object(obj.object_name)
+                and obj.last_modified.date() > month_end(month_start_date)
+                for obj, month_start_date in zip(year_months, month_start_dates)
+            )
+            if is_complete:
+                closed_years.append((ric, year, year_months))
+    return closed_years
+
+
+def compact_year(bucket_name, ric, year, objects, delete=False):
+    """
+    Writes the year object of a RIC.
+
+    Returns
+    -------
+        tuple
+            The number of month objects merged and their total size in bytes.
+    """
+    frames = []
+    size = 0
+    for obj in objects:
+        content = get_object(bucket_name, obj.object_name)
+        size += len(content)
+        dfm = decode_month(content, obj.object_name, FORMATTERS[bucket_name])
+        if dfm.shape[0] > 0:
+            frames.append(dfm)
+    dfm = safe_concat(frames).sort_index() if len(frames) > 0 else pd.DataFrame()
+    put_bytes(frame_to_parquet(dfm), bucket_name, year_name(ric, year))
+    if delete:
+        for obj in objects:
+            remove_object(bucket_name, obj.object_name)
+    return len(objects), size
+
+
+def compact(bucket_name, workers=16, delete=False):
+    closed_years = list_closed_years(bucket_name)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda args: compact_year(bucket_name, *args, delete=delete),
+                closed_years,
+            )
+        )
+    number_of_objects = sum(number for number, _ in results)
+    size = sum(size for _, size in results)
+    print(
+        f"{bucket_name}: {len(closed_years)} years compacted "
+        f"from {number_of_objects} month objects ({size / 1e6:.1f} MB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("buckets", nargs="*", default=MONTHLY_BUCKETS)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument(
+        "--delete", action="store_true", help="remove month objects once compacted"
+    )
+    args = parser.parse_args()
+    for bucket_name in args.buckets:
+        compact(bucket_name, workers=args.workers, delete=args.delete)
+
+
+if __name__ == "__main__":
+    main()
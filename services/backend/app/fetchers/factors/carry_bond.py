@@ -2,20 +2,25 @@ import numpy as np
 import pandas as pd
 
 from ..common.cache import safe_concat
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
+@cache_factor("carry/bond")
 def factor_carry_bond(future, start_date, end_date):
     stem = future["Stem"]["Reuters"]
-    dfm_5, error_message = ohlcv__raw(
-        future["CarryFactor"]["GovernmentInterestRate5Y"], start_date, end_date
+    ric_5 = future["CarryFactor"]["GovernmentInterestRate5Y"]
+    ric_10 = future["CarryFactor"]["GovernmentInterestRate10Y"]
+    error_message = ohlcv__raw.prefetch(
+        [ric_5, ric_10, "US3MT=RR"], start_date, end_date
     )
+    if error_message is not None:
+        return None, error_message
+    dfm_5, error_message = ohlcv__raw(ric_5, start_date, end_date)
     if error_message is not None:
         return None, error_message
     dfm_5 = dfm_5.add_suffix("_5")
-    dfm_10, error_message = ohlcv__raw(
-        future["CarryFactor"]["GovernmentInterestRate10Y"], start_date, end_date
-    )
+    dfm_10, error_message = ohlcv__raw(ric_10, start_date, end_date)
     if error_message is not None:
         return None, error_message
     dfm_10 = dfm_10.add_suffix("_10")
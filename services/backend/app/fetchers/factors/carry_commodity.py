@@ -1,9 +1,11 @@
 import pandas as pd
 
 from ..common.cache import safe_concat, stem_to_ric
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
+@cache_factor("carry/commodity")
 def factor_carry_commodity(future, start_date, end_date):
     stem = future["Stem"]["Reuters"]
     dfm_1, error_message = ohlcv__raw(stem_to_ric(stem, "c1"), start_date, end_date)
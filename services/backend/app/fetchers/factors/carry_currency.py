@@ -1,8 +1,10 @@
 import pandas as pd
 
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
+@cache_factor("carry/currency")
 def factor_carry_currency(future, start_date, end_date):
     ric = future["CarryFactor"]["LocalInterestRate"]
     dfm, error_message = ohlcv__raw(ric, start_date, end_date)
@@ -3,6 +3,7 @@ import pandas as pd
 
 from ..common.cache import cache_in_s3, json_data_to_df, safe_concat
 from ..common.eikon import get_data
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
@@ -45,6 +46,7 @@ def risk_free_rate(future, start_date, end_date):
     return dfm, None
 
 
+@cache_factor("carry/equity")
 def factor_carry_equity(future, start_date, end_date):
     dfm_dividend, error_message = dividend(future, start_date, end_date)
     if error_message is not None:
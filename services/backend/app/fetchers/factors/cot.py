@@ -1,13 +1,13 @@
 import json
 import os
-import tempfile
 
 import pandas as pd
 import quandl as qdl
 
 from ..common.cache import download_from_s3, json_data_to_df
 from ..common.constants import FUTURES
-from ..common.minio import exists_object, put_object
+from ..common.minio import exists_object, get_object, put_bytes
+from ..common.storage import frame_to_parquet, parquet_to_frame
 
 
 # What are the different COT types
@@ -20,6 +20,7 @@ COT_TYPES = {
 
 # Quandl API Key
 qdl.ApiConfig.api_key = os.getenv("QUANDL_API_KEY")
+qdl.ApiConfig.api_base = os.getenv("QUANDL_API_BASE", qdl.ApiConfig.api_base)
 
 
 def download_commitment_of_traders(stem, cot_type="F"):
@@ -31,6 +32,19 @@ def download_commitment_of_traders(stem, cot_type="F"):
     return dfm
 
 
+def read_commitment_of_traders(bucket_name, stem):
+    """
+    Reads the cached COT data of a stem, stored as Parquet or, before
+    migration, as JSON.
+    """
+    if exists_object(bucket_name, f"{stem}.parquet"):
+        return parquet_to_frame(get_object(bucket_name, f"{stem}.parquet"))
+    if exists_object(bucket_name, f"{stem}.json"):
+        data, _ = download_from_s3(bucket_name, f"{stem}.json")
+        return json_data_to_df(data, version="v1")
+    return None
+
+
 def get_commitment_of_traders(stem, cot_type="F"):
     """
     Get the cot data and cache it (Refresh it if file is older than 7 days).
@@ -45,11 +59,9 @@ def get_commitment_of_traders(stem, cot_type="F"):
     :return: Dataframe with COT data
     """
     bucket_name = "daily-cot"
-    object_name = f"{stem}.json"
     df_quandl = download_commitment_of_traders(stem=stem, cot_type=cot_type)
-    if exists_object(bucket_name, object_name):
-        data, _ = download_from_s3(bucket_name, object_name)
-        df_s3 = json_data_to_df(data, version="v1")
+    df_s3 = read_commitment_of_traders(bucket_name, stem)
+    if df_s3 is not None:
         df_quandl = df_quandl.loc[
             df_quandl.index > df_s3.index[-1],
         ]
@@ -57,14 +69,9 @@ def get_commitment_of_traders(stem, cot_type="F"):
     else:
         df_concat = df_quandl
     data = json.loads(df_concat.reset_index(level=0).to_json(orient="records"))
-    response = {"data": data, "error": {}}
-    temp_dir = tempfile.TemporaryDirectory()
-    path = os.path.join(temp_dir.name, object_name)
-    with open(path, "w") as handler:
-        json.dump(response, handler)
-    put_object(path, bucket_name)
-    temp_dir.cleanup()
-    return json_data_to_df(data, version="v1")
+    dfm = json_data_to_df(data, version="v1")
+    put_bytes(frame_to_parquet(dfm), bucket_name, f"{stem}.parquet")
+    return dfm
 
 
 def factor_cot(future, start_date, end_date):
@@ -1,8 +1,10 @@
 import pandas as pd
 
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
+@cache_factor("currency")
 def factor_currency(future, start_date, end_date):
     ric = future["CurrencyFactor"]
     dfm, error_message = ohlcv__raw(ric, start_date, end_date)
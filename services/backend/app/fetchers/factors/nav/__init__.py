@@ -1,9 +1,11 @@
 import pandas as pd
 
+from ...common.factor_cache import cache_factor
 from .strategies.buy_and_hold import BuyAndHoldBacktester
 from .strategies.sell_and_hold import SellAndHoldBacktester
 
 
+@cache_factor("nav/long", exact_window=True)
 def factor_nav_long(future, start_date, end_date):
     stem = future["Stem"]["Reuters"]
     stems = [stem]
@@ -30,6 +32,7 @@ def factor_nav_long(future, start_date, end_date):
     return dfm, None
 
 
+@cache_factor("nav/short", exact_window=True)
 def factor_nav_short(future, start_date, end_date):
     stem = future["Stem"]["Reuters"]
     stems = [stem]
@@ -44,6 +44,18 @@ STOCK_CURRENCIES = [
 ]
 
 
+# Pair converting each currency to USD, and whether it must be inverted
+USD_PAIRS = {
+    "AUD": ("USDAUD=R", True),
+    "CAD": ("CADUSD=R", False),
+    "CHF": ("CHFUSD=R", False),
+    "EUR": ("USDEUR=R", True),
+    "GBP": ("USDGBP=R", True),
+    "HKD": ("HKDUSD=R", False),
+    "JPY": ("JPYUSD=R", False),
+    "SGD": ("SGDUSD=R", False),
+}
+
 client = Client()
 
 
@@ -67,25 +79,12 @@ class Forex:
     @ring.lru()
     @staticmethod
     def to_usd(currency, day):
-        if currency == "AUD":
-            return Forex.get_pair(day, "USDAUD=R", invert=True)
-        elif currency == "CAD":
-            return Forex.get_pair(day, "CADUSD=R")
-        elif currency == "CHF":
-            return Forex.get_pair(day, "CHFUSD=R")
-        elif currency == "EUR":
-            return Forex.get_pair(day, "USDEUR=R", invert=True)
-        elif currency == "GBP":
-            return Forex.get_pair(day, "USDGBP=R", invert=True)
-        elif currency == "HKD":
-            return Forex.get_pair(day, "HKDUSD=R")
-        elif currency == "JPY":
-            return Forex.get_pair(day, "JPYUSD=R")
-        elif currency == "USD":
+        if currency == "USD":
             return 1
-        elif currency == "SGD":
-            return Forex.get_pair(day, "SGDUSD=R")
-        return np.NaN
+        if currency not in USD_PAIRS:
+            return np.NaN
+        ric, invert = USD_PAIRS[currency]
+        return Forex.get_pair(day, ric, invert=invert)
 
     @ring.lru()
     @staticmethod
@@ -27,7 +27,7 @@ def get_future_ohlcv(ric, start_date, end_date):
     if dfm is None:
         return None, error
     dfm.reset_index(drop=False, inplace=True)
-    dfm.Date = dfm.Date.apply(lambda x: x[:10])
+    dfm.Date = dfm.Date.apply(lambda x: str(x)[:10])
     dfm.drop(columns=["RIC"], inplace=True)
     dfm.set_index("Date", drop=True, inplace=True)
     return dfm, error
@@ -1,12 +1,12 @@
 from datetime import date, datetime, timedelta
-import tempfile
+import io
 
 import pandas as pd
 import ring
 
 from ....common.client import Client
 from ....common.constants import FUTURES, START_DATE
-from ....common.minio import exists_object, fget_object
+from ....common.minio import exists_object, get_object
 
 
 client = Client()
@@ -124,9 +124,7 @@ def get_chain(stem, day=START_DATE, minimum_time_to_expiry=0):
     object_name = f"{stem}.csv"
     if not exists_object(bucket_name, object_name):
         raise Exception(f"No object {bucket_name}/{object_name} in S3")
-    with tempfile.NamedTemporaryFile(suffix=".csv") as f_in:
-        fget_object(bucket_name, object_name, f_in.name)
-        dfm = pd.read_csv(f_in.name)
+    dfm = pd.read_csv(io.BytesIO(get_object(bucket_name, object_name)))
     if datetime.strptime(dfm.LTD.iloc[-1], "%Y-%m-%d").date() - day < timedelta(
         days=minimum_time_to_expiry
     ):
@@ -0,0 +1,62 @@
+"""
+Factors served by the API, by endpoint name.
+"""
+from .carry_bond import factor_carry_bond
+from .carry_commodity import factor_carry_commodity
+from .carry_currency import factor_carry_currency
+from .carry_equity import factor_carry_equity
+from .cot import factor_cot
+from .currency import factor_currency
+from .nav import factor_nav_long, factor_nav_short
+from .roll_return import factor_roll_return
+from .splits import factor_splits
+
+
+FACTORS = {
+    "carry/bond": factor_carry_bond,
+    "carry/commodity": factor_carry_commodity,
+    "carry/currency": factor_carry_currency,
+    "carry/equity": factor_carry_equity,
+    "cot": factor_cot,
+    "currency": factor_currency,
+    "nav/long": factor_nav_long,
+    "nav/short": factor_nav_short,
+    "roll-return": factor_roll_return,
+    "splits": factor_splits,
+}
+
+# Column holding the value of single-column factors
+FACTOR_COLUMNS = {
+    "carry/bond": "CarryFactor",
+    "carry/commodity": "CarryFactor",
+    "carry/currency": "CarryFactor",
+    "carry/equity": "CarryFactor",
+    "currency": "CurrencyFactor",
+    "nav/long": "NavLong",
+    "nav/short": "NavShort",
+    "roll-return": "RollReturn",
+    "splits": "TrainingSets",
+}
+
+
+def factor_applies(name, future):
+    """
+    Tells if a factor can be computed for a future of `FUTURES`.
+    """
+    carry_factor = future.get("CarryFactor") or {}
+    if name == "carry/bond":
+        return (
+            "GovernmentInterestRate5Y" in carry_factor
+            and "GovernmentInterestRate10Y" in carry_factor
+        )
+    if name == "carry/commodity":
+        return future.get("Group") == "Commodities"
+    if name == "carry/currency":
+        return "LocalInterestRate" in carry_factor
+    if name == "carry/equity":
+        return "ExpectedDividend" in carry_factor
+    if name == "cot":
+        return future.get("COT") is not None
+    if name == "currency":
+        return future.get("CurrencyFactor") is not None
+    return True
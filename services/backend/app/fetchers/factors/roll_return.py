@@ -1,15 +1,20 @@
 import pandas as pd
 
 from ..common.cache import safe_concat, stem_to_ric
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
+@cache_factor("roll-return")
 def factor_roll_return(future, start_date, end_date):
     stem = future["Stem"]["Reuters"]
+    suffixes = [f"c{i+1}" for i in range(5)]
+    rics = [stem_to_ric(stem, suffix) for suffix in suffixes]
+    error_message = ohlcv__raw.prefetch(rics, start_date, end_date)
+    if error_message is not None:
+        return None, error_message
     dfms_dict = {}
-    for i in range(5):
-        suffix = f"c{i+1}"
-        ric = stem_to_ric(stem, suffix)
+    for suffix, ric in zip(suffixes, rics):
         dfm, _ = ohlcv__raw(ric, start_date, end_date)
         if dfm is None:
             continue
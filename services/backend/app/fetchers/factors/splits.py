@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from ..common.factor_cache import cache_factor
 from ..ohlcv import ohlcv__raw
 
 
@@ -25,6 +26,7 @@ def business_conditions(future, start_date, end_date):
     return dfm[[column]]
 
 
+@cache_factor("splits", exact_window=True)
 def factor_splits(future, start_date, end_date):
     """ """
     column = "TrainingSets"
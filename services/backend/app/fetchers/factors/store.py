@@ -0,0 +1,239 @@
+"""
+Materialized (Date x Stem) store of single-column factors.
+
+One wide frame per factor, indexed by date with one column per stem, is kept
+in Minio and in memory. Factors computed day by day from their inputs are
+refreshed incrementally: only the last `FACTOR_STORE_LOOKBACK_DAYS` of every
+stem are recomputed, to pick up revised inputs. Factors whose values depend
+on the start of their window (the NAV backtests, the splits state machine)
+are recomputed over the full history.
+"""
+from datetime import datetime, timedelta
+import io
+import os
+import threading
+
+import pandas as pd
+
+from .registry import FACTOR_COLUMNS, FACTORS, factor_applies
+from ..batch import executor
+from ..common.constants import FUTURES, START_DATE
+from ..common.etag import CODE_VERSION
+from ..common.minio import (
+    get_object,
+    make_bucket_if_not_exists,
+    put_bytes,
+    stat_object_if_exists,
+)
+
+
+FACTOR_STORE_BUCKET = "factor-store"
+FACTOR_STORE_LOOKBACK_DAYS = int(os.getenv("FACTOR_STORE_LOOKBACK_DAYS", "400"))
+
+stores = {}
+stores_lock = threading.Lock()
+refreshing = set()
+
+
+def object_name(name):
+    return f"{name}/{CODE_VERSION}.parquet"
+
+
+def load_store(name):
+    """
+    Loads the wide frame of a factor, or None if it was never materialized.
+
+    The in-memory copy is reused as long as the object in Minio is unchanged.
+    """
+    stat = stat_object_if_exists(FACTOR_STORE_BUCKET, object_name(name))
+    if stat is None:
+        return None
+    etag = stat.etag
+    with stores_lock:
+        cached = stores.get(name)
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    content = get_object(FACTOR_STORE_BUCKET, object_name(name))
+    wide = pd.read_parquet(io.BytesIO(content)).set_index("Date")
+    with stores_lock:
+        stores[name] = (etag, wide)
+    return wide
+
+
+def save_store(name, wide):
+    buffer = io.BytesIO()
+    wide.reset_index().to_parquet(buffer, index=False, compression="zstd")
+    make_bucket_if_not_exists(FACTOR_STORE_BUCKET)
+    etag = put_bytes(buffer.getvalue(), FACTOR_STORE_BUCKET, object_name(name)).etag
+    with stores_lock:
+        stores[name] = (etag, wide)
+
+
+def compute_series(name, future, start_date, end_date):
+    factor = FACTORS[name]
+    compute = getattr(factor, "__wrapped__", factor)
+    try:
+        dfm, error_message = compute(future, start_date, end_date)
+    except Exception as exception:  # pylint: disable=broad-except
+        return None, str(exception)
+    if error_message is not None:
+        return None, error_message
+    series = dfm[FACTOR_COLUMNS[name]].droplevel("Stem")
+    series.index = pd.to_datetime(series.index)
+    return series[~series.index.duplicated(keep="last")], None
+
+
+def refresh_store(name, end_date=None):
+    """
+    Recomputes the recent history of a factor for every stem it applies to,
+    or its full history if the factor depends on the start of its window.
+
+    Returns
+    -------
+        dict
+            Error messages by ticker.
+    """
+    if end_date is None:
+        end_date = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    wide = load_store(name)
+    is_incremental = not getattr(FACTORS[name], "exact_window", False)
+    jobs = {}
+    for ticker, future in FUTURES.items():
+        if not factor_applies(name, future):
+            continue
+        stem = future["Stem"]["Reuters"]
+        start_date = datetime.combine(START_DATE, datetime.min.time())
+        if is_incremental and wide is not None and stem in wide.columns:
+            last_date = wide[stem].last_valid_index()
+            if last_date is not None:
+                start_date = max(
+                    start_date,
+                    last_date - timedelta(days=FACTOR_STORE_LOOKBACK_DAYS),
+                )
+        jobs[ticker] = (
+            stem,
+            start_date,
+            executor.submit(compute_series, name, future, start_date, end_date),
+        )
+    columns = {}
+    errors = {}
+    for ticker, (stem, start_date, job) in jobs.items():
+        series, error_message = job.result()
+        if error_message is not None:
+            errors[ticker] = error_message
+            continue
+        if wide is not None and stem in wide.columns:
+            previous = wide[stem].dropna()
+            series = pd.concat([previous[previous.index < start_date], series])
+        columns[stem] = series
+    if wide is not None:
+        for stem in wide.columns:
+            if stem not in columns:
+                columns[stem] = wide[stem].dropna()
+    if len(columns) > 0:
+        wide = pd.concat(columns, axis=1).sort_index()
+        wide.index.name = "Date"
+        save_store(name, wide)
+    return errors
+
+
+def start_refreshing(name):
+    """
+    Takes the refresh slot of a store, so that two refreshes of the same
+    factor never race to save it.
+
+    Returns
+    -------
+        bool
+            False if the store is already being refreshed.
+    """
+    with stores_lock:
+        if name in refreshing:
+            return False
+        refreshing.add(name)
+        return True
+
+
+def stop_refreshing(name):
+    with stores_lock:
+        refreshing.discard(name)
+
+
+def refresh_store_once(name):
+    """
+    Refreshes a store unless it is already being refreshed.
+
+    Returns
+    -------
+        dict
+            Error messages by ticker, or None if the store is already being
+            refreshed.
+    """
+    if not start_refreshing(name):
+        return None
+    try:
+        return refresh_store(name)
+    finally:
+        stop_refreshing(name)
+
+
+def refresh_in_background(name):
+    """
+    Starts refreshing a store unless it is already being refreshed.
+    """
+    if not start_refreshing(name):
+        return
+
+    def target():
+        try:
+            refresh_store(name)
+        finally:
+            stop_refreshing(name)
+
+    threading.Thread(target=target, daemon=True).start()
+
+
+def is_outdated(wide):
+    last_business_day = datetime.utcnow().date() - timedelta(days=1)
+    while last_business_day.weekday() in [5, 6]:
+        last_business_day -= timedelta(days=1)
+    return wide is None or wide.index.max().date() < last_business_day
+
+
+def get_snapshot(name, day):
+    """
+    Values of a factor for every stem as of a date.
+
+    Parameters
+    ----------
+        name: string
+            Factor name, for example carry/bond
+        day: datetime
+
+    Returns
+    -------
+        tuple
+            A frame indexed by (Date, Stem) holding the last known value of
+            each stem and its date (AsOf), and an error message.
+    """
+    if name not in FACTOR_COLUMNS:
+        return None, f"No snapshot for factor {name}"
+    wide = load_store(name)
+    if is_outdated(wide):
+        refresh_in_background(name)
+    if wide is None:
+        return None, f"Factor store {name} is being built, retry later"
+    history = wide.loc[wide.index <= day]
+    if history.shape[0] == 0:
+        return None, "No data"
+    column = FACTOR_COLUMNS[name]
+    dfm = pd.DataFrame(
+        {
+            column: history.ffill().iloc[-1],
+            "AsOf": history.apply(lambda series: series.last_valid_index()),
+        }
+    ).dropna(subset=[column])
+    arrays = [[day] * len(dfm), dfm.index]
+    tuples = list(zip(*arrays))
+    dfm.index = pd.MultiIndex.from_tuples(tuples, names=["Date", "Stem"])
+    return dfm, None
@@ -2,10 +2,7 @@ from datetime import date, datetime, timedelta
 
 from .common.cache import download_from_s3, save_in_s3
 from .common.eikon import get_data
-from .common.minio import (
-    exists_object,
-    stat_object,
-)
+from .common.manifest import find_object
 
 
 def cache_in_s3(bucket_name):
@@ -33,11 +30,11 @@ def cache_in_s3(bucket_name):
                 year = int(f"{year_12}{year_3}{year_4}")
                 is_old_ric = year < (date.today() - timedelta(days=365)).year
             object_name = f"{ric}.json"
-            this_object_exists = exists_object(bucket_name, object_name)
+            cached = find_object(bucket_name, object_name)
+            this_object_exists = cached is not None
             if this_object_exists and not is_old_ric:
-                last_modified = stat_object(bucket_name, object_name).last_modified
                 already_downloaded_today = (
-                    last_modified.date() == datetime.utcnow().date()
+                    cached.last_modified.date() == datetime.utcnow().date()
                 )
             should_download_object = not this_object_exists or (
                 not is_old_ric and not already_downloaded_today
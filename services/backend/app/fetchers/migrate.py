@@ -0,0 +1,135 @@
+"""
+Offline migration of the cached JSON objects to the Parquet storage format.
+
+Usage: python -m app.fetchers.migrate [--workers 16] [--delete] [bucket ...]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import time
+
+import pyarrow as pa
+
+from .common.cache import decode_json, json_data_to_df, response_error
+from .common.minio import get_object, list_objects, put_bytes, remove_object
+from .common.storage import (
+    JSON_SUFFIX,
+    frame_to_parquet,
+    object_month,
+    parquet_name,
+    parquet_to_frame,
+)
+
+
+FORMATTERS = {
+    "daily-cot": lambda x: json_data_to_df(x, version="v1"),
+    "daily-dividend": lambda x: json_data_to_df(x, version="v2"),
+    "daily-ohlcv": json_data_to_df,
+    "daily-risk-free-rate": lambda x: json_data_to_df(x, version="v2"),
+}
+
+
+def migrate_object(bucket_name, object_name, delete=False):
+    """
+    Converts a JSON object to Parquet.
+
+    Returns
+    -------
+        dict
+            Sizes in bytes and decoding times in seconds of both formats, or
+            None if the object was skipped.
+    """
+    content = get_object(bucket_name, object_name)
+    start = time.perf_counter()
+    response = decode_json(content)
+    if response_error(response) is not None:
+        return None
+    dfm = FORMATTERS[bucket_name](response["data"])
+    json_read_time = time.perf_counter() - start
+    try:
+        parquet = frame_to_parquet(dfm)
+    except pa.ArrowException as exception:
+        print(f"Skipping {bucket_name}/{object_name}: {exception}")
+        return None
+    start = time.perf_counter()
+    parquet_to_frame(parquet)
+    parquet_read_time = time.perf_counter() - start
+    put_bytes(parquet, bucket_name, parquet_name(object_name))
+    if delete:
+        remove_object(bucket_name, object_name)
+    return {
+        "json_size": len(content),
+        "parquet_size": len(parquet),
+        "json_read_time": json_read_time,
+        "parquet_read_time": parquet_read_time,
+    }
+
+
+def migrate(bucket_name, workers=16, delete=False):
+    """
+    Converts the JSON objects of a bucket that have no Parquet version yet.
+    The current month, which the server refreshes, is left as is.
+
+    Returns
+    -------
+        dict
+            Totals of the sizes and decoding times of the migrated objects.
+    """
+    names = {o.object_name for o in list_objects(bucket_name, recursive=True)}
+    this_month = date.today().isoformat()[:7]
+    object_names = sorted(
+        name
+        for name in names
+        if name.endswith(JSON_SUFFIX)
+        and parquet_name(name) not in names
+        and object_month(name) != this_month
+    )
+    report = {
+        "objects": 0,
+        "json_size": 0,
+        "parquet_size": 0,
+        "json_read_time": 0,
+        "parquet_read_time": 0,
+    }
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda name: migrate_object(bucket_name, name, delete), object_names
+        )
+        for result in results:
+            if result is None:
+                continue
+            report["objects"] += 1
+            for key, value in result.items():
+                report[key] += value
+    return report
+
+
+def print_report(bucket_name, report):
+    if report["objects"] == 0:
+        print(f"{bucket_name}: nothing to migrate")
+        return
+    print(
+        f"{bucket_name}: {report['objects']} objects, "
+        f"{report['json_size'] / 1e6:.1f} MB -> "
+        f"{report['parquet_size'] / 1e6:.1f} MB "
+        f"({report['parquet_size'] / report['json_size']:.0%}), "
+        f"decoding {report['json_read_time'] * 1000 / report['objects']:.2f} ms -> "
+        f"{report['parquet_read_time'] * 1000 / report['objects']:.2f} ms per object"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("buckets", nargs="*", default=sorted(FORMATTERS))
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument(
+        "--delete", action="store_true", help="remove JSON objects once migrated"
+    )
+    args = parser.parse_args()
+    for bucket_name in args.buckets:
+        report = migrate(bucket_name, workers=args.workers, delete=args.delete)
+        print_report(bucket_name, report)
+
+
+if __name__ == "__main__":
+    main()
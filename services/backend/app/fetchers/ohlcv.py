@@ -1,20 +1,36 @@
 import pandas as pd
 
-from .common.cache import cache_in_s3, json_data_to_df
-from .common.eikon import get_timeseries
+from .common.cache import acache_in_s3, cache_in_s3, json_data_to_df, response_error
+from .common.eikon import aget_timeseries, get_timeseries, split_timeseries
 
 
-@cache_in_s3("daily-ohlcv", json_data_to_df)
+def ohlcv__batch(rics, start_date, end_date):
+    response = get_timeseries(
+        rics,
+        start_date=start_date.isoformat(),
+        end_date=end_date.isoformat(),
+        normalize=True,
+    )
+    if response_error(response) is not None:
+        return response
+    return split_timeseries(response)
+
+
+@cache_in_s3("daily-ohlcv", json_data_to_df, batch_func=ohlcv__batch)
 def ohlcv__raw(ric, start_date, end_date):
     return get_timeseries(
         ric, start_date=start_date.isoformat(), end_date=end_date.isoformat()
     )
 
 
-def ohlcv(ric, start_date, end_date):
-    dfm, error_message = ohlcv__raw(ric, start_date, end_date)
-    if error_message is not None:
-        return None, error_message
+@acache_in_s3("daily-ohlcv", json_data_to_df)
+async def aohlcv__raw(ric, start_date, end_date):
+    return await aget_timeseries(
+        ric, start_date=start_date.isoformat(), end_date=end_date.isoformat()
+    )
+
+
+def format_ohlcv(dfm, ric):
     columns = ["OPEN", "HIGH", "LOW", "CLOSE", "VOLUME"]
     for col in list(set(columns) - set(dfm.columns)):
         dfm[col] = None
@@ -23,4 +39,26 @@ def ohlcv(ric, start_date, end_date):
     arrays = [dfm.index, [ric] * len(dfm)]
     tuples = list(zip(*arrays))
     dfm.index = pd.MultiIndex.from_tuples(tuples, names=["Date", "RIC"])
-    return dfm, None
+    return dfm
+
+
+def ohlcv(ric, start_date, end_date):
+    dfm, error_message = ohlcv__raw(ric, start_date, end_date)
+    if error_message is not None:
+        return None, error_message
+    return format_ohlcv(dfm, ric), None
+
+
+async def aohlcv(ric, start_date, end_date):
+    dfm, error_message = await aohlcv__raw(ric, start_date, end_date)
+    if error_message is not None:
+        return None, error_message
+    return format_ohlcv(dfm, ric), None
+
+
+async def aiter_ohlcv(ric, start_date, end_date):
+    async for dfm, error_message in aohlcv__raw.iter_months(ric, start_date, end_date):
+        if error_message is not None:
+            yield None, error_message
+            return
+        yield format_ohlcv(dfm, ric), None
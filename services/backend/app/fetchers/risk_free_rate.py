@@ -1,7 +1,7 @@
 import pandas as pd
 
-from .common.cache import cache_in_s3, json_data_to_df
-from .common.eikon import get_data
+from .common.cache import acache_in_s3, cache_in_s3, json_data_to_df
+from .common.eikon import aget_data, get_data
 
 
 @cache_in_s3("daily-risk-free-rate", lambda x: json_data_to_df(x, version="v2"))
@@ -13,13 +13,43 @@ def risk_free_rate__raw(ric, start_date, end_date):
     )
 
 
-def risk_free_rate(ric, start_date, end_date):
-    dfm, error_message = risk_free_rate__raw(ric, start_date, end_date)
-    if error_message is not None:
-        return None, error_message
+@acache_in_s3("daily-risk-free-rate", lambda x: json_data_to_df(x, version="v2"))
+async def arisk_free_rate__raw(ric, start_date, end_date):
+    return await aget_data(
+        instruments=ric,
+        fields=["TR.FIXINGVALUE.Date", "TR.FIXINGVALUE"],
+        parameters={"SDate": start_date.isoformat(), "EDate": end_date.isoformat()},
+    )
+
+
+def format_risk_free_rate(dfm, ric):
     dfm = dfm[["Fixing Value"]]
     dfm = dfm.rename(columns={"Fixing Value": "FixingValue"})
     arrays = [dfm.index, [ric] * len(dfm)]
     tuples = list(zip(*arrays))
     dfm.index = pd.MultiIndex.from_tuples(tuples, names=["Date", "RIC"])
-    return dfm, None
+    return dfm
+
+
+def risk_free_rate(ric, start_date, end_date):
+    dfm, error_message = risk_free_rate__raw(ric, start_date, end_date)
+    if error_message is not None:
+        return None, error_message
+    return format_risk_free_rate(dfm, ric), None
+
+
+async def arisk_free_rate(ric, start_date, end_date):
+    dfm, error_message = await arisk_free_rate__raw(ric, start_date, end_date)
+    if error_message is not None:
+        return None, error_message
+    return format_risk_free_rate(dfm, ric), None
+
+
+async def aiter_risk_free_rate(ric, start_date, end_date):
+    async for dfm, error_message in arisk_free_rate__raw.iter_months(
+        ric, start_date, end_date
+    ):
+        if error_message is not None:
+            yield None, error_message
+            return
+        yield format_risk_free_rate(dfm, ric), None
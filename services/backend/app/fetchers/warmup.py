@@ -0,0 +1,241 @@
+"""
+Nightly refresh of the current month of every RIC the factors need.
+
+Usage: python -m app.fetchers.warmup [--workers 4] [--date YYYY-MM-DD]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from datetime import date, datetime, timedelta
+import os
+import threading
+import time
+
+from .batch import fetch_one
+from .common.cache import month_end, stem_to_ric
+from .common.constants import FUTURES
+from .common.minio import exists_bucket, list_objects
+from .common.single_flight import (
+    SINGLE_FLIGHT_LOCK_DIR,
+    open_lock_file,
+    try_lock,
+    unlock,
+)
+from .common.storage import is_month_object, object_month
+from .factors.carry_equity import dividend__raw
+from .factors.nav.models.forex import USD_PAIRS
+from .ohlcv import ohlcv__raw
+from .risk_free_rate import risk_free_rate__raw
+
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_HOUR = int(os.getenv("WARMUP_HOUR", "2"))
+WARMUP_MAX_WORKERS = int(os.getenv("WARMUP_MAX_WORKERS", "4"))
+WARMUP_STAMP = os.path.join(SINGLE_FLIGHT_LOCK_DIR, "warmup-date")
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "3"))
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "300"))
+
+# RICs read by the factors for every future
+COMMON_RICS = ["US3MT=RR", ".SPX"]
+
+
+def ohlcv_rics(future):
+    stem = future["Stem"]["Reuters"]
+    carry_factor = future.get("CarryFactor") or {}
+    rics = [stem_to_ric(stem, f"c{i+1}") for i in range(5)]
+    for key in [
+        "GovernmentInterestRate5Y",
+        "GovernmentInterestRate10Y",
+        "LocalInterestRate",
+    ]:
+        if key in carry_factor:
+            rics.append(carry_factor[key])
+    if future.get("CurrencyFactor") is not None:
+        rics.append(future["CurrencyFactor"])
+    if future.get("Currency") in USD_PAIRS:
+        rics.append(USD_PAIRS[future["Currency"]][0])
+    return rics
+
+
+def dividend_rics(future):
+    carry_factor = future.get("CarryFactor") or {}
+    if "ExpectedDividend" in carry_factor:
+        return [carry_factor["ExpectedDividend"]]
+    return []
+
+
+# Cached fetcher and RICs of the futures, by bucket
+WARMUPS = {
+    "daily-ohlcv": (ohlcv__raw, ohlcv_rics),
+    "daily-dividend": (dividend__raw, dividend_rics),
+    "daily-risk-free-rate": (risk_free_rate__raw, lambda future: []),
+}
+
+
+def cached_rics(bucket_name, months):
+    """
+    Lists the RICs with an object for one of the months (YYYY-MM), which
+    were requested lately.
+    """
+    if not exists_bucket(bucket_name):
+        return set()
+    return {
+        os.path.dirname(obj.object_name)
+        for obj in list_objects(bucket_name, recursive=True)
+        if is_month_object(obj.object_name) and object_month(obj.object_name) in months
+    }
+
+
+def list_rics(bucket_name, months):
+    _, future_rics = WARMUPS[bucket_name]
+    rics = set(cached_rics(bucket_name, months))
+    for future in FUTURES.values():
+        rics.update(future_rics(future))
+    if bucket_name == "daily-ohlcv":
+        rics.update(COMMON_RICS)
+    return sorted(rics)
+
+
+def warm_up_ric(fetcher, ric, start_date, end_date):
+    return fetch_one(lambda key: fetcher(key, start_date, end_date), ric)
+
+
+def warm_up(day=None, workers=WARMUP_MAX_WORKERS, only=None):
+    """
+    Refreshes the current month, and the previous one if it was not
+    refreshed since it ended, of the RICs of every bucket.
+
+    Parameters
+    ----------
+        only: list
+            (bucket, RIC) pairs to refresh, all the RICs by default.
+
+    Returns
+    -------
+        dict
+            Error messages by (bucket, RIC), "*" standing for every RIC of a
+            bucket when the combined download failed.
+    """
+    if day is None:
+        day = date.today()
+    month_start_date = date(day.year, day.month, 1)
+    previous_month_start_date = (month_start_date - timedelta(days=1)).replace(day=1)
+    # The last month of a range is the one refreshed
+    ranges = [
+        (previous_month_start_date, month_end(previous_month_start_date)),
+        (month_start_date, day),
+    ]
+    months = [start_date.isoformat()[:7] for start_date, _ in ranges]
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for bucket_name, (fetcher, _) in WARMUPS.items():
+            if only is None:
+                rics = list_rics(bucket_name, months)
+            else:
+                rics = sorted(ric for bucket, ric in only if bucket == bucket_name)
+            if len(rics) == 0:
+                continue
+            start = time.perf_counter()
+            for start_date, end_date in ranges:
+                start_datetime = datetime.combine(start_date, datetime.min.time())
+                end_datetime = datetime.combine(end_date, datetime.min.time())
+                if hasattr(fetcher, "prefetch"):
+                    error_message = fetcher.prefetch(rics, start_datetime, end_datetime)
+                    if error_message is not None:
+                        errors[(bucket_name, "*")] = error_message
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        warm_up_ric,
+                        fetcher,
+                        ric,
+                        start_datetime,
+                        end_datetime,
+                    )
+                    for ric in rics
+                ]
+                for ric, future in zip(rics, futures):
+                    _, error_message = future.result()
+                    if error_message is not None:
+                        errors[(bucket_name, ric)] = error_message
+            print(
+                f"{bucket_name}: {len(rics)} RICs warmed up "
+                f"in {time.perf_counter() - start:.0f} s"
+            )
+    return errors
+
+
+def warm_up_once(day):
+    """
+    Warms up the cache unless another worker of the node is doing it or did
+    it for the day. The RICs which failed are retried, and the day is only
+    recorded as done once every RIC is warm.
+    """
+    handle = open_lock_file("warmup")
+    if handle is not None and not try_lock(handle):
+        os.close(handle)
+        return
+    try:
+        if os.path.exists(WARMUP_STAMP):
+            with open(WARMUP_STAMP, "r") as stamp:
+                if stamp.read() == day.isoformat():
+                    return
+        errors = warm_up(day)
+        for _ in range(WARMUP_RETRIES):
+            # The RICs of a bucket whose combined download failed were warmed
+            # up alone, and have their own errors
+            failed = [key for key in errors if key[1] != "*"]
+            if len(failed) == 0:
+                break
+            time.sleep(WARMUP_RETRY_DELAY)
+            errors = warm_up(day, only=failed)
+        failed = [key for key in errors if key[1] != "*"]
+        if len(failed) > 0:
+            print(f"Warm-up failed for {len(failed)} RICs")
+            return
+        os.makedirs(os.path.dirname(WARMUP_STAMP), exist_ok=True)
+        with open(WARMUP_STAMP, "w") as stamp:
+            stamp.write(day.isoformat())
+    finally:
+        unlock(handle)
+
+
+def seconds_until(hour):
+    now = datetime.utcnow()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def schedule_loop():
+    while True:
+        time.sleep(seconds_until(WARMUP_HOUR))
+        try:
+            warm_up_once(datetime.utcnow().date())
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Warm-up failed: {exception}")
+
+
+def start_scheduler():
+    """
+    Starts warming up the cache every night at `WARMUP_HOUR` (UTC).
+    """
+    if WARMUP_ENABLED:
+        threading.Thread(target=schedule_loop, name="warmup", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--workers", type=int, default=WARMUP_MAX_WORKERS)
+    parser.add_argument(
+        "--date", type=date.fromisoformat, default=None, help="day to warm up"
+    )
+    args = parser.parse_args()
+    errors = warm_up(args.date, workers=args.workers)
+    for (bucket_name, ric), error_message in sorted(errors.items()):
+        print(f"{bucket_name}/{ric}: {error_message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,53 @@
 from datetime import datetime
+import json
 import os
+import time
+from typing import List
 
-from fastapi import FastAPI, HTTPException, Depends, Request
-import numpy as np
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.routing import Match
+
+from .compression import CompressionMiddleware
+from .fetchers import warmup
+from .fetchers.batch import fetch_many
 
 from .fetchers.clean import clean
+from .fetchers.common import eikon, manifest, minio
 from .fetchers.common.constants import FUTURES
+from .fetchers.common.etag import (
+    cache_control,
+    compute_etag,
+    dependencies,
+    get_known_dependencies,
+    list_versions,
+    remember_dependencies,
+)
+from .fetchers.common.metrics import (
+    REQUEST_DURATION,
+    export_metrics,
+    server_timing,
+    start_timings,
+    timed_function,
+)
+from .fetchers.common.pagination import (
+    acollect_frames,
+    aproject_frames,
+    page_start_date,
+    paginate,
+    project,
+)
+from .fetchers.common.serialization import (
+    JSON,
+    MEDIA_TYPES,
+    NDJSON,
+    aframes_to_ndjson,
+    dataframe_to_bytes,
+    dataframe_to_ndjson,
+    dataframe_to_records,
+    negotiate_format,
+)
 from .fetchers.expiry_calendar import expiry_calendar
 from .fetchers.factors.carry_bond import factor_carry_bond
 from .fetchers.factors.carry_commodity import factor_carry_commodity
@@ -14,28 +56,159 @@ from .fetchers.factors.carry_equity import factor_carry_equity
 from .fetchers.factors.cot import factor_cot
 from .fetchers.factors.currency import factor_currency
 from .fetchers.factors.nav import factor_nav_long, factor_nav_short
+from .fetchers.factors.registry import FACTOR_COLUMNS, FACTORS
 from .fetchers.factors.roll_return import factor_roll_return
 from .fetchers.factors.splits import factor_splits
+from .fetchers.factors.store import get_snapshot, refresh_store_once
 from .fetchers.health_ric import health_ric
-from .fetchers.ohlcv import ohlcv
-from .fetchers.risk_free_rate import risk_free_rate
+from .fetchers.ohlcv import aiter_ohlcv, aohlcv, ohlcv, ohlcv__raw
+from .fetchers.risk_free_rate import (
+    aiter_risk_free_rate,
+    arisk_free_rate,
+)
 
 
 DATA_SECRET_KEY = os.getenv("DATA_SECRET_KEY")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Endpoints reading data which is not cached in S3 month by month
+UNTRACKED_FACTORS = ["cot", "nav/long", "nav/short", "news/headlines", "news/stories"]
 
 app = FastAPI()
 
 
+def error_response(error):
+    return JSONResponse(
+        content={"data": None, "error": error},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
 def catch_errors(func):
     def decorator(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as exception:  # pylint: disable=broad-except
-            return {"data": None, "error": str(exception)}
+            return error_response(str(exception))
+
+    return decorator
+
+
+def acatch_errors(func):
+    async def decorator(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as exception:  # pylint: disable=broad-except
+            return error_response(str(exception))
 
     return decorator
 
 
+def has_tracked_inputs(path):
+    if not (path.startswith("/daily/") or path.startswith("/batch/daily/")):
+        return False
+    return not any(path.endswith(f"/factor/{name}") for name in UNTRACKED_FACTORS)
+
+
+@app.middleware("http")
+async def etag_middleware(req: Request, call_next):
+    """
+    Tags responses with the versions of the S3 objects they are computed from
+    and answers 304 when the client already has the current version.
+    """
+    if req.method != "GET" or not has_tracked_inputs(req.url.path):
+        return await call_next(req)
+    key = "|".join(
+        [
+            req.url.path,
+            str(sorted(req.query_params.multi_items())),
+            req.headers.get("Accept", ""),
+            req.headers.get("Accept-Encoding", ""),
+        ]
+    )
+    if_none_match = req.headers.get("If-None-Match")
+    recorded = get_known_dependencies(key)
+    authorized = req.headers.get("Authorization") == DATA_SECRET_KEY
+    if authorized and if_none_match is not None and recorded is not None:
+        versions, is_fresh = list_versions(recorded)
+        etag = compute_etag(key, versions) if versions is not None else None
+        if is_fresh and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(
+                status_code=304,
+                headers={
+                    "Cache-Control": cache_control(recorded),
+                    "ETag": etag,
+                    "Vary": "Accept, Authorization",
+                },
+            )
+    recorded = []
+    dependencies.set(recorded)
+    response = await call_next(req)
+    is_stream = response.headers.get("Content-Type", "").startswith(
+        MEDIA_TYPES[NDJSON]
+    )
+    if (
+        response.status_code != 200
+        or "Cache-Control" in response.headers
+        or is_stream
+        or len(recorded) == 0
+    ):
+        return response
+    remember_dependencies(key, recorded)
+    versions, _ = list_versions(recorded)
+    response.headers["Cache-Control"] = cache_control(recorded)
+    if versions is not None:
+        response.headers["ETag"] = compute_etag(key, versions)
+    response.headers["Vary"] = "Accept, Authorization"
+    return response
+
+
+def route_template(scope):
+    """
+    Path template of the route matching a request, so that metrics have one
+    label per endpoint rather than one per URL.
+    """
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+@app.middleware("http")
+async def timing_middleware(req: Request, call_next):
+    """
+    Reports the time spent in each stage in a Server-Timing header.
+    """
+    template = route_template(req.scope)
+    collected = start_timings(template)
+    start = time.perf_counter()
+    response = await call_next(req)
+    total = time.perf_counter() - start
+    REQUEST_DURATION.labels(template).observe(total)
+    response.headers["Server-Timing"] = server_timing(collected, total)
+    return response
+
+
+app.add_middleware(CompressionMiddleware)
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    manifest.start_manifests()
+    warmup.start_scheduler()
+
+
+@app.on_event("shutdown")
+async def close_async_sessions():
+    manifest.stop_manifests()
+    await eikon.close_async_session()
+    await minio.async_client.close_session()
+
+
 def verify_token(req: Request):
     token = req.headers.get("Authorization")
     if token != DATA_SECRET_KEY:
@@ -43,6 +216,174 @@ def verify_token(req: Request):
     return True
 
 
+def response_format(req: Request, format: str = None):  # pylint: disable=redefined-builtin
+    media_format = negotiate_format(format, req.headers.get("Accept"))
+    if media_format is None:
+        raise HTTPException(status_code=406, detail="Not Acceptable")
+    return media_format
+
+
+def page_parameters(
+    fields: List[str] = Query(None),
+    limit: int = Query(None, gt=0),
+    after: str = None,
+):
+    return {"fields": fields, "limit": limit, "after": after}
+
+
+def select_page(dfm, page=None):
+    """
+    Applies the fields projection and the pagination of a request.
+
+    Returns
+    -------
+        tuple
+            The page, the cursor of the next page and an error message.
+    """
+    if page is None:
+        return dfm, None, None
+    dfm, error_message = project(dfm, page["fields"])
+    if error_message is not None:
+        return None, None, error_message
+    dfm, next_after = paginate(dfm, page["limit"], page["after"])
+    return dfm, next_after, None
+
+
+@timed_function("serialize")
+def to_response(dfm, error_message, media_format=JSON, page=None):
+    if error_message is not None:
+        return error_response(error_message)
+    dfm, next_after, error_message = select_page(dfm, page)
+    if error_message is not None:
+        return error_response(error_message)
+    headers = {"X-Next-After": next_after} if next_after is not None else None
+    if media_format == JSON:
+        return JSONResponse(
+            content=jsonable_encoder(
+                {"data": dataframe_to_records(dfm), "error": None}
+            ),
+            headers=headers,
+        )
+    if media_format == NDJSON:
+        return StreamingResponse(
+            dataframe_to_ndjson(dfm), media_type=MEDIA_TYPES[NDJSON], headers=headers
+        )
+    return Response(
+        content=dataframe_to_bytes(dfm, media_format),
+        media_type=MEDIA_TYPES[media_format],
+        headers=headers,
+    )
+
+
+def to_stream_response(frames, page=None):
+    if page is not None and page["fields"]:
+        frames = aproject_frames(frames, page["fields"])
+    return StreamingResponse(
+        aframes_to_ndjson(frames), media_type=MEDIA_TYPES[NDJSON]
+    )
+
+
+@timed_function("serialize")
+def to_batch_response(dfm, errors, media_format=JSON, page=None):
+    if dfm is None:
+        return error_response(errors if errors is not None else "No data")
+    dfm, next_after, error_message = select_page(dfm, page)
+    if error_message is not None:
+        return error_response(error_message)
+    headers = {}
+    if errors is not None:
+        headers["Cache-Control"] = "no-store"
+        headers["X-Error"] = json.dumps(errors)
+    if next_after is not None:
+        headers["X-Next-After"] = next_after
+    if media_format == JSON:
+        return JSONResponse(
+            content=jsonable_encoder(
+                {"data": dataframe_to_records(dfm), "error": errors}
+            ),
+            headers=headers,
+        )
+    if media_format == NDJSON:
+        return StreamingResponse(
+            dataframe_to_ndjson(dfm), media_type=MEDIA_TYPES[NDJSON], headers=headers
+        )
+    return Response(
+        content=dataframe_to_bytes(dfm, media_format),
+        media_type=MEDIA_TYPES[media_format],
+        headers=headers,
+    )
+
+
+@catch_errors
+def batch_daily_factor(
+    name: str,
+    start_date: str,
+    end_date: str,
+    tickers: List[str],
+    media_format: str = JSON,
+    page: dict = None,
+):
+    factor = FACTORS[name]
+    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+    dfm, errors = fetch_many(
+        lambda ticker: factor(
+            future=FUTURES[ticker], start_date=start_datetime, end_date=end_datetime
+        ),
+        tickers,
+    )
+    return to_batch_response(dfm, errors, media_format, page)
+
+
+@app.get("/batch/daily/factor/{name:path}")
+def handler_batch_daily_factor(
+    name: str,
+    start_date: str,
+    end_date: str,
+    tickers: List[str] = Query(...),
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
+    authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
+):
+    if name not in FACTORS:
+        raise HTTPException(status_code=404, detail=f"Unknown factor {name}")
+    return batch_daily_factor(name, start_date, end_date, tickers, media_format, page)
+
+
+@catch_errors
+def batch_daily_ohlcv(
+    start_date: str,
+    end_date: str,
+    rics: List[str],
+    media_format: str = JSON,
+    page: dict = None,
+):
+    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+    # Errors of single RICs are reported by RIC, the RICs being fetched alone
+    # afterwards
+    error_message = ohlcv__raw.prefetch(rics, start_datetime, end_datetime)
+    if error_message is not None:
+        return error_response(error_message)
+    dfm, errors = fetch_many(
+        lambda ric: ohlcv(ric=ric, start_date=start_datetime, end_date=end_datetime),
+        rics,
+    )
+    return to_batch_response(dfm, errors, media_format, page)
+
+
+@app.get("/batch/daily/ohlcv")
+def handler_batch_daily_ohlcv(
+    start_date: str,
+    end_date: str,
+    rics: List[str] = Query(...),
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
+    authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
+):
+    return batch_daily_ohlcv(start_date, end_date, rics, media_format, page)
+
+
 @app.get("/clean")
 def handler_clean(
     bucket_name: str,
@@ -53,21 +394,19 @@ def handler_clean(
 
 
 @catch_errors
-def daily_factor_carry_bond(ticker: str, start_date: str, end_date: str):
+def daily_factor_carry_bond(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_carry_bond(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/carry/bond")
@@ -75,27 +414,27 @@ def handler_daily_factor_carry_bond(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_carry_bond(ticker, start_date, end_date)
+    return daily_factor_carry_bond(ticker, start_date, end_date, media_format, page)
 
 
 @catch_errors
-def daily_factor_carry_commodity(ticker: str, start_date: str, end_date: str):
+def daily_factor_carry_commodity(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_carry_commodity(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/carry/commodity")
@@ -103,27 +442,29 @@ def handler_daily_factor_carry_commodity(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_carry_commodity(ticker, start_date, end_date)
+    return daily_factor_carry_commodity(
+        ticker, start_date, end_date, media_format, page
+    )
 
 
 @catch_errors
-def daily_factor_carry_currency(ticker: str, start_date: str, end_date: str):
+def daily_factor_carry_currency(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_carry_currency(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/carry/currency")
@@ -131,27 +472,27 @@ def handler_daily_factor_carry_currency(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_carry_currency(ticker, start_date, end_date)
+    return daily_factor_carry_currency(ticker, start_date, end_date, media_format, page)
 
 
 @catch_errors
-def daily_factor_carry_equity(ticker: str, start_date: str, end_date: str):
+def daily_factor_carry_equity(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_carry_equity(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/carry/equity")
@@ -159,27 +500,27 @@ def handler_daily_factor_carry_equity(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_carry_equity(ticker, start_date, end_date)
+    return daily_factor_carry_equity(ticker, start_date, end_date, media_format, page)
 
 
 @catch_errors
-def daily_factor_cot(ticker: str, start_date: str, end_date: str):
+def daily_factor_cot(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_cot(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/cot")
@@ -187,27 +528,27 @@ def handler_daily_factor_cot(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_cot(ticker, start_date, end_date)
+    return daily_factor_cot(ticker, start_date, end_date, media_format, page)
 
 
 @catch_errors
-def daily_factor_currency(ticker: str, start_date: str, end_date: str):
+def daily_factor_currency(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_currency(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/currency")
@@ -215,9 +556,11 @@ def handler_daily_factor_currency(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_currency(ticker, start_date, end_date)
+    return daily_factor_currency(ticker, start_date, end_date, media_format, page)
 
 
 @app.get("/daily/factor/nav/long")
@@ -225,6 +568,8 @@ def handler_daily_factor_nav_long(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
     dfm, error_message = factor_nav_long(
@@ -232,15 +577,7 @@ def handler_daily_factor_nav_long(
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/nav/short")
@@ -248,6 +585,8 @@ def handler_daily_factor_nav_short(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
     dfm, error_message = factor_nav_short(
@@ -255,15 +594,7 @@ def handler_daily_factor_nav_short(
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/news/headlines")
@@ -287,21 +618,19 @@ def handler_daily_factor_news_stories(
 
 
 @catch_errors
-def daily_factor_roll_return(ticker: str, start_date: str, end_date: str):
+def daily_factor_roll_return(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_roll_return(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/factor/roll-return")
@@ -309,27 +638,48 @@ def handler_daily_factor_roll_return(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_roll_return(ticker, start_date, end_date)
+    return daily_factor_roll_return(ticker, start_date, end_date, media_format, page)
 
 
 @catch_errors
-def daily_factor_splits(ticker: str, start_date: str, end_date: str):
+def daily_factor_splits(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
     dfm, error_message = factor_splits(
         future=FUTURES.get(ticker),
         start_date=datetime.strptime(start_date, "%Y-%m-%d"),
         end_date=datetime.strptime(end_date, "%Y-%m-%d"),
     )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
+    return to_response(dfm, error_message, media_format, page)
+
+
+@catch_errors
+def daily_factor_snapshot(
+    name: str, day: str, media_format: str = JSON, page: dict = None
+):
+    dfm, error_message = get_snapshot(
+        name=name, day=datetime.strptime(day, "%Y-%m-%d")
     )
-    return {"data": data, "error": error_message}
+    return to_response(dfm, error_message, media_format, page)
+
+
+@app.get("/daily/factor/{name:path}/snapshot")
+def handler_daily_factor_snapshot(
+    name: str,
+    date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
+    authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
+):
+    return daily_factor_snapshot(name, date, media_format, page)
 
 
 @app.get("/daily/factor/splits")
@@ -337,65 +687,89 @@ def handler_daily_splits(
     ticker: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_factor_splits(ticker, start_date, end_date)
+    return daily_factor_splits(ticker, start_date, end_date, media_format, page)
 
 
-@catch_errors
-def daily_ohlcv(ric: str, start_date: str, end_date: str):
-    dfm, error_message = ohlcv(
-        ric=ric,
-        start_date=datetime.strptime(start_date, "%Y-%m-%d"),
-        end_date=datetime.strptime(end_date, "%Y-%m-%d"),
-    )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+@acatch_errors
+async def daily_ohlcv(
+    ric: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
+    after = page["after"] if page is not None else None
+    limit = page["limit"] if page is not None else None
+    start = page_start_date(datetime.strptime(start_date, "%Y-%m-%d"), after)
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    if media_format == NDJSON and limit is None:
+        return to_stream_response(
+            aiter_ohlcv(ric=ric, start_date=start, end_date=end), page
+        )
+    if limit is not None:
+        # Only the months needed to fill the page are read
+        dfm, error_message = await acollect_frames(
+            aiter_ohlcv(ric=ric, start_date=start, end_date=end), limit
+        )
+    else:
+        dfm, error_message = await aohlcv(ric=ric, start_date=start, end_date=end)
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/ohlcv")
-def handler_daily_ohlcv(
+async def handler_daily_ohlcv(
     ric: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_ohlcv(ric, start_date, end_date)
+    return await daily_ohlcv(ric, start_date, end_date, media_format, page)
 
 
-@catch_errors
-def daily_risk_free_rate(ric: str, start_date: str, end_date: str):
-    dfm, error_message = risk_free_rate(
-        ric=ric,
-        start_date=datetime.strptime(start_date, "%Y-%m-%d"),
-        end_date=datetime.strptime(end_date, "%Y-%m-%d"),
-    )
-    data = (
-        dfm.reset_index()
-        .replace({np.inf: np.nan})
-        .replace({np.nan: None})
-        .to_dict(orient="records")
-        if error_message is None
-        else None
-    )
-    return {"data": data, "error": error_message}
+@acatch_errors
+async def daily_risk_free_rate(
+    ric: str,
+    start_date: str,
+    end_date: str,
+    media_format: str = JSON,
+    page: dict = None,
+):
+    after = page["after"] if page is not None else None
+    limit = page["limit"] if page is not None else None
+    start = page_start_date(datetime.strptime(start_date, "%Y-%m-%d"), after)
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    if media_format == NDJSON and limit is None:
+        return to_stream_response(
+            aiter_risk_free_rate(ric=ric, start_date=start, end_date=end), page
+        )
+    if limit is not None:
+        # Only the months needed to fill the page are read
+        dfm, error_message = await acollect_frames(
+            aiter_risk_free_rate(ric=ric, start_date=start, end_date=end), limit
+        )
+    else:
+        dfm, error_message = await arisk_free_rate(
+            ric=ric, start_date=start, end_date=end
+        )
+    return to_response(dfm, error_message, media_format, page)
 
 
 @app.get("/daily/risk-free-rate")
-def handler_daily_risk_free_rate(
+async def handler_daily_risk_free_rate(
     ric: str,
     start_date: str,
     end_date: str,
+    media_format: str = Depends(response_format),
+    page: dict = Depends(page_parameters),
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
 ):
-    return daily_risk_free_rate(ric, start_date, end_date)
+    return await daily_risk_free_rate(ric, start_date, end_date, media_format, page)
 
 
 @app.get("/expiry-calendar")
@@ -413,6 +787,21 @@ def handler_expiry_calendar(
     return {"data": data, "error": error_message}
 
 
+@app.get("/factor-store/refresh")
+def handler_factor_store_refresh(
+    name: str,
+    authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
+):
+    if name not in FACTOR_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown factor {name}")
+    errors = refresh_store_once(name)
+    if errors is None:
+        raise HTTPException(
+            status_code=409, detail=f"Factor store {name} is being refreshed"
+        )
+    return {"data": "OK", "error": errors if len(errors) > 0 else None}
+
+
 @app.get("/health")
 def handler_health():
     return {"data": "OK", "error": None}
@@ -426,6 +815,16 @@ def handler_health_ric(
     return health_ric(ric)
 
 
+@app.get("/metrics")
+def handler_metrics(
+    authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
+):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    content, media_type = export_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 @app.get("/tickers")
 def handler_tickers(
     authorized: bool = Depends(verify_token),  # pylint: disable=unused-argument
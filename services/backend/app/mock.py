@@ -0,0 +1,392 @@
+"""
+Stand-in for the Eikon proxy and the Quandl API, to benchmark the data server
+offline.
+
+Answers are replayed from `MOCK_RECORDINGS_DIR` when recorded. Otherwise they
+are forwarded to `MOCK_EIKON_UPSTREAM` or `MOCK_QUANDL_UPSTREAM` when set, and
+recorded, or else generated: every RIC gets a deterministic synthetic history,
+so that the chains of all the futures can be served. Every call waits
+`MOCK_LATENCY` milliseconds (give or take `MOCK_JITTER`), and calls beyond
+`MOCK_RATE` per second are throttled the way upstream does.
+
+Usage: uvicorn app.mock:app --port 8001
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import aiohttp
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import numpy as np
+
+
+MOCK_RECORDINGS_DIR = os.getenv("MOCK_RECORDINGS_DIR", "recordings")
+MOCK_EIKON_UPSTREAM = os.getenv("MOCK_EIKON_UPSTREAM")
+MOCK_QUANDL_UPSTREAM = os.getenv("MOCK_QUANDL_UPSTREAM")
+MOCK_LATENCY = float(os.getenv("MOCK_LATENCY", "0"))
+MOCK_JITTER = float(os.getenv("MOCK_JITTER", "0"))
+MOCK_RATE = float(os.getenv("MOCK_RATE", "0"))
+
+HISTORY_START_DATE = date(2000, 1, 1)
+# Query parameters forwarded upstream but neither recorded nor part of the key
+SECRET_PARAMETERS = ["api_key"]
+OHLCV_FIELDS = ["OPEN", "HIGH", "LOW", "CLOSE", "VOLUME"]
+# Columns of the answers of get_data, by field
+DATA_COLUMNS = {
+    "TR.FIXINGVALUE": "Fixing Value",
+    "TR.Index_DIV_YLD_RTRS": "Calculated Index Dividend Yield",
+}
+COT_COLUMNS = [
+    "Open Interest",
+    "Producer/Merchant/Processor/User Longs",
+    "Producer/Merchant/Processor/User Shorts",
+    "Swap Dealer Longs",
+    "Swap Dealer Shorts",
+    "Swap Dealer Spreads",
+    "Money Manager Longs",
+    "Money Manager Shorts",
+    "Money Manager Spreads",
+    "Other Reportable Longs",
+    "Other Reportable Shorts",
+    "Other Reportable Spreads",
+    "Total Reportable Longs",
+    "Total Reportable Shorts",
+    "Non Reportable Longs",
+    "Non Reportable Shorts",
+]
+
+app = FastAPI()
+
+bucket = {"tokens": MOCK_RATE, "updated_at": time.time()}
+bucket_lock = threading.Lock()
+
+
+def is_throttled():
+    """
+    Token bucket of `MOCK_RATE` calls per second, 0 allowing every call.
+    """
+    if MOCK_RATE <= 0:
+        return False
+    with bucket_lock:
+        now = time.time()
+        tokens = bucket["tokens"] + (now - bucket["updated_at"]) * MOCK_RATE
+        bucket["tokens"] = min(MOCK_RATE, tokens)
+        bucket["updated_at"] = now
+        if bucket["tokens"] < 1:
+            return True
+        bucket["tokens"] -= 1
+        return False
+
+
+async def wait_latency():
+    latency = MOCK_LATENCY + random.uniform(-MOCK_JITTER, MOCK_JITTER)
+    await asyncio.sleep(max(0, latency) / 1000)
+
+
+def recorded_query(request):
+    return sorted(
+        (name, value)
+        for name, value in request.query_params.multi_items()
+        if name not in SECRET_PARAMETERS
+    )
+
+
+def recording_path(service, request):
+    key = json.dumps([request.url.path, recorded_query(request)])
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(MOCK_RECORDINGS_DIR, service, f"{digest}.json")
+
+
+def read_recording(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as recording:
+        return json.load(recording)
+
+
+def write_recording(path, request, status_code, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    recording = {
+        "path": request.url.path,
+        "query": recorded_query(request),
+        "status_code": status_code,
+        "content": content,
+    }
+    with open(path, "w") as handler:
+        json.dump(recording, handler)
+
+
+async def forward(upstream, path, request):
+    headers = {}
+    if "Authorization" in request.headers:
+        headers["Authorization"] = request.headers["Authorization"]
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            upstream + path, headers=headers, params=request.query_params.multi_items()
+        ) as response:
+            return response.status, await response.json(content_type=None)
+
+
+async def answer(service, upstream, path, request, generate):
+    """
+    Replays, records or generates the answer of a call.
+
+    Parameters
+    ----------
+        service: string
+            eikon or quandl
+        upstream: string
+            Base URL calls are forwarded to when not recorded, or None
+        path: string
+            Path of the call relative to the upstream base URL
+        generate: func()
+            Synthetic answer, used when nothing is recorded nor forwarded
+    """
+    await wait_latency()
+    if is_throttled():
+        if service == "eikon":
+            return JSONResponse({"data": None, "error": None})
+        return JSONResponse({"quandl_error": {"code": "QELx01"}}, status_code=429)
+    path_on_disk = recording_path(service, request)
+    recording = read_recording(path_on_disk)
+    if recording is not None:
+        return JSONResponse(recording["content"], status_code=recording["status_code"])
+    if upstream is not None:
+        status_code, content = await forward(upstream, path, request)
+        write_recording(path_on_disk, request, status_code, content)
+        return JSONResponse(content, status_code=status_code)
+    return JSONResponse(generate())
+
+
+def seed(*keys):
+    return int(hashlib.sha1(repr(keys).encode()).hexdigest()[:8], 16)
+
+
+def synthetic_history(ric, start_date, end_date):
+    """
+    Daily prices of a RIC, the same whatever the range asked.
+
+    Returns
+    -------
+        list
+            Tuples (day, {field: value}).
+    """
+    days = np.arange(
+        np.datetime64(HISTORY_START_DATE),
+        np.datetime64(end_date) + 1,
+        dtype="datetime64[D]",
+    )
+    days = days[np.is_busday(days)]
+    rng = np.random.default_rng(seed(ric))
+    level = 10 + 90 * rng.random()
+    closes = level * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+    opens = closes * np.exp(rng.normal(0, 0.005, len(days)))
+    spreads = closes * np.abs(rng.normal(0, 0.01, len(days)))
+    volumes = rng.integers(1000, 100000, len(days))
+    history = []
+    for i, day in enumerate(days):
+        day = day.astype(date)
+        if day < start_date:
+            continue
+        history.append(
+            (
+                day,
+                {
+                    "OPEN": float(opens[i]),
+                    "HIGH": float(max(opens[i], closes[i]) + spreads[i]),
+                    "LOW": float(min(opens[i], closes[i]) - spreads[i]),
+                    "CLOSE": float(closes[i]),
+                    "VOLUME": int(volumes[i]),
+                },
+            )
+        )
+    return history
+
+
+def parse_date(value, default):
+    if value is None or value == "":
+        return default
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+
+def to_milliseconds(day):
+    return (day - date(1970, 1, 1)).days * 86400 * 1000
+
+
+def generate_timeseries(rics, fields, start_date, end_date, normalize):
+    fields = OHLCV_FIELDS if fields in ("*", "") else fields.split(",")
+    if not normalize and len(rics) == 1:
+        return {
+            "data": [
+                {"Date": to_milliseconds(day), **{f: values.get(f) for f in fields}}
+                for day, values in synthetic_history(rics[0], start_date, end_date)
+            ],
+            "error": None,
+        }
+    return {
+        "data": [
+            {
+                "Date": to_milliseconds(day),
+                "Security": ric,
+                "Field": field,
+                "Value": values.get(field),
+            }
+            for ric in rics
+            for day, values in synthetic_history(ric, start_date, end_date)
+            for field in fields
+        ],
+        "error": None,
+    }
+
+
+def generate_data(instruments, fields, parameters):
+    """
+    Daily values of the fields between SDate and EDate, one record per day,
+    or a single record per instrument without a date field.
+    """
+    start_date = parse_date(parameters.get("SDate"), date.today())
+    end_date = parse_date(parameters.get("EDate"), start_date)
+    has_dates = any(field.endswith(".Date") for field in fields)
+    records = []
+    for ric in instruments:
+        history = synthetic_history(ric, start_date, end_date)
+        if not has_dates:
+            history = history[-1:] or [(end_date, {"CLOSE": 1.0})]
+        for day, values in history:
+            record = {"Instrument": ric}
+            for field in fields:
+                if field.endswith(".Date"):
+                    record["Date"] = f"{day.isoformat()}T00:00:00Z"
+                elif field == "TR.RIC":
+                    record["RIC"] = ric
+                else:
+                    # Yields and rates of a few percents
+                    record[DATA_COLUMNS.get(field, field)] = values["CLOSE"] / 20
+            records.append(record)
+    return {
+        "data": [{"index": i, **record} for i, record in enumerate(records)],
+        "error": None,
+    }
+
+
+def generate_cot(dataset_code):
+    days = []
+    day = date(2006, 6, 13)
+    while day <= date.today():
+        days.append(day)
+        day += timedelta(days=7)
+    rng = np.random.default_rng(seed(dataset_code))
+    data = [
+        [day.isoformat()] + [int(value) for value in rng.integers(0, 100000, 16)]
+        for day in days
+    ]
+    return {
+        "dataset_data": {
+            "limit": None,
+            "transform": None,
+            "column_index": None,
+            "column_names": ["Date"] + COT_COLUMNS,
+            "start_date": days[0].isoformat(),
+            "end_date": days[-1].isoformat(),
+            "frequency": "weekly",
+            "data": list(reversed(data)),
+            "collapse": None,
+            "order": None,
+        }
+    }
+
+
+def split_list(value):
+    return [item for item in value.split(",") if item]
+
+
+@app.get("/timeseries/{rics}/")
+async def handler_timeseries(
+    request: Request,
+    rics: str,
+    fields: str = "*",
+    start_date: str = None,
+    end_date: str = None,
+    normalize: str = "False",
+):
+    return await answer(
+        "eikon",
+        MOCK_EIKON_UPSTREAM,
+        f"/timeseries/{rics}/",
+        request,
+        lambda: generate_timeseries(
+            split_list(rics),
+            urllib.parse.unquote_plus(fields),
+            parse_date(start_date, HISTORY_START_DATE),
+            parse_date(end_date, date.today()),
+            normalize == "True",
+        ),
+    )
+
+
+@app.get("/data/{instruments}/{fields}/")
+async def handler_data(
+    request: Request, instruments: str, fields: str, parameters: str = "null"
+):
+    return await answer(
+        "eikon",
+        MOCK_EIKON_UPSTREAM,
+        f"/data/{instruments}/{fields}/",
+        request,
+        lambda: generate_data(
+            split_list(instruments),
+            split_list(urllib.parse.unquote_plus(fields)),
+            json.loads(urllib.parse.unquote_plus(parameters)) or {},
+        ),
+    )
+
+
+@app.get("/symbology/{symbol}/")
+async def handler_symbology(request: Request, symbol: str):
+    return await answer(
+        "eikon",
+        MOCK_EIKON_UPSTREAM,
+        f"/symbology/{symbol}/",
+        request,
+        lambda: {"data": {symbol: {"RIC": symbol}}, "error": None},
+    )
+
+
+@app.get("/news_headlines/")
+async def handler_news_headlines(request: Request):
+    return await answer(
+        "eikon",
+        MOCK_EIKON_UPSTREAM,
+        "/news_headlines/",
+        request,
+        lambda: {"data": [], "error": None},
+    )
+
+
+@app.get("/news_story/{story_id}/")
+async def handler_news_story(request: Request, story_id: str):
+    return await answer(
+        "eikon",
+        MOCK_EIKON_UPSTREAM,
+        f"/news_story/{story_id}/",
+        request,
+        lambda: {"data": "", "error": None},
+    )
+
+
+@app.get("/api/v3/datasets/{database_code}/{dataset_code}/data")
+async def handler_quandl_data(request: Request, database_code: str, dataset_code: str):
+    return await answer(
+        "quandl",
+        MOCK_QUANDL_UPSTREAM,
+        f"/datasets/{database_code}/{dataset_code}/data",
+        request,
+        lambda: generate_cot(f"{database_code}/{dataset_code}"),
+    )
@@ -0,0 +1,6 @@
+import os
+
+# The Minio and Eikon clients are created when their modules are imported
+os.environ.setdefault("DATA_DOMAIN", "localhost")
+os.environ.setdefault("EIKON_DOMAIN", "localhost")
+os.environ.setdefault("WARMUP_ENABLED", "0")
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from app.fetchers.common.cache import (
+    concat_frames,
+    json_data_to_df,
+    last_stored_date,
+    merge_days,
+)
+from app.fetchers.common.storage import parquet_to_frame
+
+
+def milliseconds(day):
+    return pd.Timestamp(day).value // 10**6
+
+
+def response(closes):
+    return {
+        "data": [
+            {"Date": milliseconds(day), "CLOSE": close} for day, close in closes.items()
+        ],
+        "error": None,
+    }
+
+
+def test_merge_days_replaces_the_downloaded_last_day():
+    stored = json_data_to_df(
+        response({"2022-02-01": 1.0, "2022-02-02": 2.0, "2022-02-03": 3.0})["data"]
+    )
+    # The last stored day is downloaded again, with its closing price
+    days = response({"2022-02-03": 3.5, "2022-02-04": 4.0})
+    merged, content = merge_days(days, stored, json_data_to_df)
+    assert list(merged.index) == list(
+        pd.to_datetime(["2022-02-01", "2022-02-02", "2022-02-03", "2022-02-04"])
+    )
+    assert list(merged.CLOSE) == [1.0, 2.0, 3.5, 4.0]
+    pd.testing.assert_frame_equal(parquet_to_frame(content), merged)
+
+
+def test_merge_days_keeps_the_month_without_new_days():
+    stored = json_data_to_df(response({"2022-02-01": 1.0})["data"])
+    merged, _ = merge_days(response({}), stored, json_data_to_df)
+    assert list(merged.CLOSE) == [1.0]
+
+
+def test_last_stored_date():
+    stored = json_data_to_df(response({"2022-02-01": 1.0, "2022-02-03": 3.0})["data"])
+    assert last_stored_date(stored).isoformat() == "2022-02-03"
+    assert last_stored_date(stored.iloc[:0]) is None
+
+
+def flat_rates():
+    # A rate unchanged over the end of January and the start of February
+    dates = pd.to_datetime(
+        ["2022-01-28", "2022-01-31", "2022-02-01", "2022-02-02", "2022-02-03"]
+    )
+    return pd.DataFrame({"Rate": [1.0, 2.0, 2.0, 2.0, 3.0]}, index=dates)
+
+
+def test_concat_frames_drops_rows_repeated_in_their_month():
+    start_date, end_date = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-02-28")
+    dfm, error_message = concat_frames(
+        [flat_rates()], "ohlcv__raw", start_date, end_date
+    )
+    assert error_message is None
+    assert list(dfm.index) == list(
+        pd.to_datetime(["2022-01-28", "2022-01-31", "2022-02-03"])
+    )
+
+
+def test_concat_frames_gives_the_same_rows_month_by_month():
+    start_date, end_date = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-02-28")
+    rates = flat_rates()
+    at_once, _ = concat_frames([rates], "ohlcv__raw", start_date, end_date)
+    months = [rates.loc[rates.index.month == month] for month in [1, 2]]
+    month_by_month = pd.concat(
+        [concat_frames([m], "ohlcv__raw", start_date, end_date)[0] for m in months]
+    )
+    pd.testing.assert_frame_equal(month_by_month, at_once)
+    # A page starting after a cursor cuts its first month after de-duplicating
+    page, _ = concat_frames(
+        [months[1]], "ohlcv__raw", pd.Timestamp("2022-02-02"), end_date
+    )
+    pd.testing.assert_frame_equal(page, at_once.loc["2022-02-02":])
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.fetchers.common import disk_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(disk_cache, "total_size", None)
+
+
+def month(close):
+    dates = pd.to_datetime(["2022-02-01", "2022-02-02"])
+    return pd.DataFrame({"CLOSE": [close, close + 1]}, index=dates)
+
+
+def test_frames_are_read_back_for_their_etag_only():
+    disk_cache.write_frame("bucket", "RIC/2022-02.parquet", "v1", month(1.0))
+    pd.testing.assert_frame_equal(
+        disk_cache.read_frame("bucket", "RIC/2022-02.parquet", "v1"),
+        month(1.0),
+        check_freq=False,
+    )
+    assert disk_cache.read_frame("bucket", "RIC/2022-02.parquet", "v2") is None
+    assert disk_cache.read_frame("bucket", "RIC/2022-02.parquet", None) is None
+
+
+def test_least_recently_read_files_are_evicted(monkeypatch):
+    disk_cache.write_frame("bucket", "RIC/2022-01.parquet", "v1", month(1.0))
+    file_size = disk_cache.total_size
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_MAX_BYTES", int(file_size * 2.5))
+    disk_cache.write_frame("bucket", "RIC/2022-02.parquet", "v1", month(2.0))
+    # Files are ordered by their modification time, set when they are read
+    os.utime(disk_cache.cache_path("bucket", "RIC/2022-01.parquet", "v1"), (1, 1))
+    os.utime(disk_cache.cache_path("bucket", "RIC/2022-02.parquet", "v1"), (2, 2))
+    disk_cache.read_frame("bucket", "RIC/2022-01.parquet", "v1")
+    disk_cache.write_frame("bucket", "RIC/2022-03.parquet", "v1", month(3.0))
+    assert disk_cache.read_frame("bucket", "RIC/2022-02.parquet", "v1") is None
+    assert disk_cache.read_frame("bucket", "RIC/2022-01.parquet", "v1") is not None
+    assert disk_cache.read_frame("bucket", "RIC/2022-03.parquet", "v1") is not None
+    assert disk_cache.total_size == 2 * file_size
+
+
+def test_disabled_tier_stores_nothing(monkeypatch, tmp_path):
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_MAX_BYTES", 0)
+    disk_cache.write_frame("bucket", "RIC/2022-02.parquet", "v1", month(1.0))
+    assert not any(tmp_path.iterdir())
+    assert disk_cache.read_frame("bucket", "RIC/2022-02.parquet", "v1") is None
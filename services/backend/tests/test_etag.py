@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.fetchers.common import manifest as manifest_module
+from app.fetchers.common.etag import CLOSED_RANGE_MAX_AGE, cache_control, list_versions
+from app.fetchers.common.manifest import Manifest
+
+
+BUCKET = "daily-ohlcv"
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def previous_month_start(day):
+    return month_start(month_start(day) - timedelta(days=1))
+
+
+@pytest.fixture
+def manifest(monkeypatch):
+    loaded = Manifest(BUCKET)
+    loaded.by_prefix = {}
+    monkeypatch.setitem(manifest_module.manifests, BUCKET, loaded)
+    return loaded
+
+
+def save(manifest, month, saved_on):  # pylint: disable=redefined-outer-name
+    object_name = f"RIC/{month.isoformat()[:7]}.parquet"
+    last_modified = datetime(
+        saved_on.year, saved_on.month, saved_on.day, 12, tzinfo=timezone.utc
+    )
+    manifest.update(
+        object_name,
+        manifest_module.ObjectVersion(object_name, month.isoformat(), last_modified),
+    )
+
+
+def recorded(first_month, last_month):
+    return [(BUCKET, "RIC", first_month.isoformat()[:7], last_month.isoformat()[:7])]
+
+
+def test_closed_month_saved_after_its_end_is_fresh(manifest):
+    today = datetime.utcnow().date()
+    last_month = previous_month_start(today)
+    first_month = previous_month_start(last_month)
+    save(manifest, first_month, today)
+    save(manifest, last_month, month_start(today))
+    versions, is_fresh = list_versions(recorded(first_month, last_month))
+    assert is_fresh
+    assert versions == [
+        (
+            f"{BUCKET}/RIC/{first_month.isoformat()[:7]}.parquet",
+            first_month.isoformat(),
+        ),
+        (f"{BUCKET}/RIC/{last_month.isoformat()[:7]}.parquet", last_month.isoformat()),
+    ]
+    assert cache_control(recorded(first_month, last_month)) == (
+        f"public, max-age={CLOSED_RANGE_MAX_AGE}"
+    )
+
+
+def test_closed_month_saved_before_its_end_is_refreshed(manifest):
+    today = datetime.utcnow().date()
+    last_month = previous_month_start(today)
+    save(manifest, last_month, last_month + timedelta(days=10))
+    _, is_fresh = list_versions(recorded(last_month, last_month))
+    assert not is_fresh
+    assert cache_control(recorded(last_month, last_month)) == "no-cache"
+
+
+def test_current_month_is_fresh_once_saved_today(manifest):
+    today = datetime.utcnow().date()
+    this_month = month_start(today)
+    save(manifest, this_month, today)
+    _, is_fresh = list_versions(recorded(this_month, this_month))
+    assert is_fresh
+    assert cache_control(recorded(this_month, this_month)) == "no-cache"
+    save(manifest, this_month, today - timedelta(days=1))
+    _, is_fresh = list_versions(recorded(this_month, this_month))
+    assert not is_fresh
+
+
+def test_missing_month_is_not_fresh(manifest):
+    today = datetime.utcnow().date()
+    last_month = previous_month_start(today)
+    first_month = previous_month_start(last_month)
+    save(manifest, last_month, month_start(today))
+    _, is_fresh = list_versions(recorded(first_month, last_month))
+    assert not is_fresh
+
+
+def test_no_versions_until_the_manifest_is_loaded(manifest):
+    manifest.by_prefix = None
+    today = datetime.utcnow().date()
+    assert list_versions(recorded(today, today)) == (None, False)
+    assert cache_control(recorded(today, today)) == "no-cache"
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.fetchers.common import factor_cache
+from app.fetchers.common.factor_cache import Entry, entry_key
+
+
+def frame():
+    index = pd.MultiIndex.from_tuples(
+        [(pd.Timestamp("2022-02-01"), "CL"), (pd.Timestamp("2022-02-02"), "CL")],
+        names=["Date", "Stem"],
+    )
+    return pd.DataFrame({"Carry": [0.1, 0.2]}, index=index)
+
+
+def entry(end_date, computed_on):
+    return Entry(frame(), datetime(2022, 2, 1), end_date, [], [], computed_on)
+
+
+def test_get_entry_reads_a_saved_entry_once(monkeypatch):
+    objects = {}
+    calls = []
+
+    def get_object_if_exists(bucket_name, object_name):
+        calls.append(object_name)
+        return objects.get((bucket_name, object_name))
+
+    def put_bytes(content, bucket_name, object_name):
+        objects[(bucket_name, object_name)] = content
+
+    monkeypatch.setattr(factor_cache, "entries", OrderedDict())
+    monkeypatch.setattr(factor_cache, "get_object_if_exists", get_object_if_exists)
+    monkeypatch.setattr(factor_cache, "make_bucket_if_not_exists", lambda _: None)
+    monkeypatch.setattr(factor_cache, "put_bytes", put_bytes)
+    key = entry_key("carry/bond", "CL")
+    assert factor_cache.get_entry(key) is None
+    factor_cache.save_entry(
+        key, entry(datetime(2022, 2, 2), datetime(2022, 3, 1).date())
+    )
+    loaded = factor_cache.get_entry(key)
+    pd.testing.assert_frame_equal(loaded.dfm, frame())
+    assert loaded.end_date == datetime(2022, 2, 2)
+    assert factor_cache.get_entry(key) is loaded
+    assert calls == [factor_cache.object_name(key)] * 2
+
+
+def test_untracked_entry_of_the_current_month_is_valid_for_the_day():
+    today = datetime.utcnow()
+    assert entry(datetime(2022, 2, 2), datetime(2022, 2, 2).date()).is_valid()
+    assert entry(today, today.date()).is_valid()
+    assert not entry(today, (today - timedelta(days=1)).date()).is_valid()
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.fetchers.common import frame_cache
+from app.fetchers.common.frame_cache import frame_size, get_frame, set_frame
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(frame_cache, "entries", OrderedDict())
+    monkeypatch.setattr(frame_cache, "total_size", 0)
+
+
+def month(close):
+    dates = pd.to_datetime(["2022-02-01", "2022-02-02"])
+    return pd.DataFrame({"CLOSE": [close, close + 1]}, index=dates)
+
+
+def test_least_recently_used_frames_are_evicted_over_the_budget(monkeypatch):
+    monkeypatch.setattr(
+        frame_cache, "FRAME_CACHE_MAX_BYTES", int(frame_size(month(1.0)) * 2.5)
+    )
+    set_frame("bucket", "RIC/2022-01.parquet", month(1.0))
+    set_frame("bucket", "RIC/2022-02.parquet", month(2.0))
+    assert get_frame("bucket", "RIC/2022-01.parquet") is not None
+    set_frame("bucket", "RIC/2022-03.parquet", month(3.0))
+    assert get_frame("bucket", "RIC/2022-02.parquet") is None
+    assert get_frame("bucket", "RIC/2022-01.parquet") is not None
+    assert get_frame("bucket", "RIC/2022-03.parquet") is not None
+    assert frame_cache.total_size == 2 * frame_size(month(1.0))
+
+
+def test_frames_larger_than_the_budget_are_not_kept(monkeypatch):
+    monkeypatch.setattr(frame_cache, "FRAME_CACHE_MAX_BYTES", 10)
+    set_frame("bucket", "RIC/2022-01.parquet", month(1.0))
+    assert get_frame("bucket", "RIC/2022-01.parquet") is None
+    assert frame_cache.total_size == 0
+
+
+def test_frames_of_another_version_are_dropped():
+    set_frame("bucket", "RIC/2022-01.parquet", month(1.0), "v1")
+    assert get_frame("bucket", "RIC/2022-01.parquet", "v1") is not None
+    assert get_frame("bucket", "RIC/2022-01.parquet") is not None
+    assert get_frame("bucket", "RIC/2022-01.parquet", "v2") is None
+    assert get_frame("bucket", "RIC/2022-01.parquet", "v1") is None
+    assert frame_cache.total_size == 0
+
+
+def test_frames_of_the_current_month_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(frame_cache.time, "monotonic", lambda: now[0])
+    this_month = datetime.utcnow().date().isoformat()[:7]
+    set_frame("bucket", f"RIC/{this_month}.parquet", month(1.0))
+    set_frame("bucket", "RIC/2022-01.parquet", month(1.0))
+    now[0] += frame_cache.FRAME_CACHE_TTL + 1
+    assert get_frame("bucket", f"RIC/{this_month}.parquet") is None
+    assert get_frame("bucket", "RIC/2022-01.parquet") is not None
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.fetchers.common import manifest as manifest_module
+from app.fetchers.common.manifest import (
+    Manifest,
+    ObjectVersion,
+    apply_notification,
+    find_object,
+    get_manifest,
+    record_object,
+    record_removal,
+)
+
+
+BUCKET = "daily-ohlcv"
+SAVED_ON = datetime(2022, 3, 1, tzinfo=timezone.utc)
+
+
+def version(object_name):
+    return ObjectVersion(object_name, f"etag-{object_name}", SAVED_ON)
+
+
+@pytest.fixture
+def manifest(monkeypatch):
+    listed = Manifest(BUCKET)
+    monkeypatch.setitem(manifest_module.manifests, BUCKET, listed)
+    return listed
+
+
+def test_writes_seen_while_listing_are_applied_after_it(manifest, monkeypatch):
+    def list_objects(*_, **__):
+        yield version("RIC/2022-01.parquet")
+        # Another request writes and removes objects during the listing
+        record_object(BUCKET, "RIC/2022-02.parquet", "etag-written")
+        record_removal(BUCKET, "RIC/2022-01.parquet")
+        yield version("RIC/2022-03.parquet")
+
+    monkeypatch.setattr(manifest_module, "list_objects", list_objects)
+    assert get_manifest(BUCKET) is None
+    manifest.refresh()
+    assert get_manifest(BUCKET) is manifest
+    assert sorted(o.object_name for o in manifest.list("RIC/")) == [
+        "RIC/2022-02.parquet",
+        "RIC/2022-03.parquet",
+    ]
+    assert manifest.get("RIC/2022-02.parquet").etag == "etag-written"
+    assert manifest.changes is None
+
+
+def test_a_failed_listing_keeps_the_previous_one(manifest, monkeypatch):
+    monkeypatch.setattr(
+        manifest_module,
+        "list_objects",
+        lambda *_, **__: [version("RIC/2022-01.parquet")],
+    )
+    manifest.refresh()
+
+    def failing(*_, **__):
+        yield version("RIC/2022-02.parquet")
+        raise OSError("Minio unavailable")
+
+    monkeypatch.setattr(manifest_module, "list_objects", failing)
+    with pytest.raises(OSError):
+        manifest.refresh()
+    assert [o.object_name for o in manifest.list("RIC/")] == ["RIC/2022-01.parquet"]
+    assert manifest.changes is None
+
+
+def test_notifications_update_the_manifest(manifest):
+    manifest.by_prefix = {}
+    apply_notification(
+        manifest,
+        {
+            "eventName": "s3:ObjectCreated:Put",
+            "eventTime": "2022-03-01T00:00:00.000Z",
+            "s3": {"object": {"key": "RIC%3D%2F2022-01.parquet", "eTag": "v1"}},
+        },
+    )
+    assert find_object(BUCKET, "RIC=/2022-01.parquet") == ObjectVersion(
+        "RIC=/2022-01.parquet", "v1", SAVED_ON
+    )
+    apply_notification(
+        manifest,
+        {
+            "eventName": "s3:ObjectRemoved:Delete",
+            "s3": {"object": {"key": "RIC%3D%2F2022-01.parquet"}},
+        },
+    )
+    assert find_object(BUCKET, "RIC=/2022-01.parquet") is None
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.fetchers.common import minio
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.released = False
+
+    async def read(self):
+        return self.content
+
+    def release(self):
+        self.released = True
+
+
+class MissingKey(Exception):
+    code = "NoSuchKey"
+
+
+def test_aget_object_reads_the_whole_object(monkeypatch):
+    calls = []
+    response = Response(b"month")
+
+    async def get_object(*args, **kwargs):
+        calls.append((args, kwargs))
+        return response
+
+    monkeypatch.setattr(minio.async_client, "get_object", get_object)
+    assert asyncio.run(minio.aget_object("bucket", "object")) == b"month"
+    assert asyncio.run(minio.aget_object_if_exists("bucket", "object")) == b"month"
+    # No offset nor length: the object is never read from a range
+    assert calls == [(("bucket", "object"), {})] * 2
+    assert response.released
+
+
+def test_aget_object_if_exists_returns_none_when_missing(monkeypatch):
+    async def get_object(*_):
+        raise MissingKey()
+
+    monkeypatch.setattr(minio.async_client, "get_object", get_object)
+    assert asyncio.run(minio.aget_object_if_exists("bucket", "object")) is None
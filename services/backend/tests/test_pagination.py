@@ -0,0 +1,77 @@
+import asyncio
+
+import pandas as pd
+
+from app.fetchers.common.pagination import acollect_frames, paginate, project
+
+
+DAYS = ["2022-02-01", "2022-02-02", "2022-02-03", "2022-02-04", "2022-02-07"]
+
+
+def long_frame(days):
+    # Two RICs a day, so that a page must not split the rows of a date
+    tuples = [(pd.Timestamp(day), ric) for day in days for ric in ["CLc1", "CLc2"]]
+    index = pd.MultiIndex.from_tuples(tuples, names=["Date", "RIC"])
+    return pd.DataFrame(
+        {"Close": range(len(tuples)), "Volume": range(len(tuples))}, index=index
+    )
+
+
+def test_project_keeps_the_fields_and_the_index():
+    dfm, error_message = project(long_frame(DAYS), ["Close", "Close"])
+    assert error_message is None
+    assert list(dfm.columns) == ["Close"]
+    assert dfm.index.names == ["Date", "RIC"]
+    assert project(long_frame(DAYS), ["Open"]) == (None, "Unknown fields: Open")
+
+
+def test_pages_follow_the_cursor_until_the_last_one():
+    dfm = long_frame(DAYS)
+    page, after = paginate(dfm, limit=2)
+    assert after == "2022-02-02"
+    assert page.shape[0] == 4
+    pages = [page]
+    while after is not None:
+        page, after = paginate(dfm, limit=2, after=after)
+        pages.append(page)
+    assert [p.shape[0] for p in pages] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(pages), dfm)
+
+
+def test_paginate_without_limit_returns_everything_after_the_cursor():
+    page, after = paginate(long_frame(DAYS), after="2022-02-04")
+    assert after is None
+    assert list(page.index.get_level_values("Date").unique()) == [
+        pd.Timestamp("2022-02-07")
+    ]
+
+
+def test_acollect_frames_stops_once_the_page_is_filled():
+    read = []
+
+    async def months():
+        for day in DAYS:
+            read.append(day)
+            yield long_frame([day]), None
+
+    dfm, error_message = asyncio.run(acollect_frames(months(), limit=2))
+    assert error_message is None
+    # One more date than the limit tells whether there is a next page
+    assert read == DAYS[:3]
+    page, after = paginate(dfm, limit=2)
+    assert after == "2022-02-02"
+    pd.testing.assert_frame_equal(
+        page, pd.concat([long_frame([day]) for day in DAYS[:2]])
+    )
+
+
+def test_acollect_frames_reports_errors_and_empty_ranges():
+    async def failing():
+        yield None, "Eikon not running"
+
+    async def empty():
+        return
+        yield  # pylint: disable=unreachable
+
+    assert asyncio.run(acollect_frames(failing(), 2)) == (None, "Eikon not running")
+    assert asyncio.run(acollect_frames(empty(), 2)) == (None, "No data")
@@ -0,0 +1,127 @@
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pytest
+
+from app.fetchers.common import cache, frame_cache, single_flight
+from app.fetchers.common import manifest as manifest_module
+from app.fetchers.common.cache import (
+    cache_in_s3,
+    encode_month,
+    json_data_to_df,
+    plan_months,
+)
+from app.fetchers.common.manifest import Manifest, ObjectVersion
+
+
+BUCKET = "daily-ohlcv"
+
+WriteResult = namedtuple("WriteResult", ["etag"])
+
+
+def saved_on(day):
+    return datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def manifest(monkeypatch):
+    loaded = Manifest(BUCKET)
+    loaded.by_prefix = {}
+    monkeypatch.setitem(manifest_module.manifests, BUCKET, loaded)
+    return loaded
+
+
+def save(manifest, object_name, day):  # pylint: disable=redefined-outer-name
+    manifest.update(object_name, ObjectVersion(object_name, object_name, saved_on(day)))
+
+
+def test_plan_reads_cached_months_and_downloads_the_others(manifest):
+    save(manifest, "RIC/2022-01.parquet", date(2022, 2, 1))
+    save(manifest, "RIC/2022-03.json", date(2022, 3, 20))
+    plan = plan_months(BUCKET, "RIC", datetime(2022, 1, 10), datetime(2022, 3, 31))
+    assert plan == [
+        (date(2022, 1, 1), "RIC/2022-01.parquet", "RIC/2022-01.parquet", False),
+        (date(2022, 2, 1), "RIC/2022-02.parquet", None, True),
+        # The last month was saved before its end
+        (date(2022, 3, 1), "RIC/2022-03.json", "RIC/2022-03.json", True),
+    ]
+
+
+def test_plan_reads_a_compacted_year_once(manifest):
+    save(manifest, "RIC/2021.parquet", date(2022, 1, 5))
+    save(manifest, "RIC/2022-01.parquet", date(2022, 2, 1))
+    plan = plan_months(BUCKET, "RIC", datetime(2021, 3, 1), datetime(2022, 1, 31))
+    assert plan == [
+        (date(2021, 3, 1), "RIC/2021.parquet", "RIC/2021.parquet", False),
+        (date(2022, 1, 1), "RIC/2022-01.parquet", "RIC/2022-01.parquet", False),
+    ]
+
+
+def test_plan_ignores_a_year_outdated_by_one_of_its_months(manifest):
+    save(manifest, "RIC/2021.parquet", date(2022, 1, 5))
+    save(manifest, "RIC/2021-12.parquet", date(2022, 1, 10))
+    plan = plan_months(BUCKET, "RIC", datetime(2021, 11, 1), datetime(2021, 12, 31))
+    assert plan == [
+        (date(2021, 11, 1), "RIC/2021-11.parquet", None, True),
+        (date(2021, 12, 1), "RIC/2021-12.parquet", "RIC/2021-12.parquet", False),
+    ]
+
+
+def response(days):
+    return {
+        "data": [
+            {"Date": pd.Timestamp(day).value // 10**6, "CLOSE": float(i)}
+            for i, day in enumerate(days)
+        ],
+        "error": None,
+    }
+
+
+@pytest.fixture
+def objects(monkeypatch, tmp_path):
+    """
+    Objects of a Minio stand-in, by name.
+    """
+    stored = {}
+
+    def put_bytes(content, bucket_name, object_name):
+        assert bucket_name == BUCKET
+        stored[object_name] = content
+        return WriteResult(f"etag-{len(stored)}")
+
+    monkeypatch.setattr(cache, "get_object_if_exists", lambda _, name: stored.get(name))
+    monkeypatch.setattr(cache, "stat_object_if_exists", lambda *_: None)
+    monkeypatch.setattr(cache, "put_bytes", put_bytes)
+    monkeypatch.setattr(cache, "make_bucket_if_not_exists", lambda _: None)
+    monkeypatch.setattr(cache, "read_frame", lambda *_: None)
+    monkeypatch.setattr(cache, "write_frame", lambda *_: None)
+    monkeypatch.setattr(frame_cache, "entries", OrderedDict())
+    monkeypatch.setattr(frame_cache, "total_size", 0)
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_LOCK_DIR", str(tmp_path))
+    return stored
+
+
+def test_months_of_a_removed_object_are_planned_again(manifest, objects):
+    february = response(["2022-02-01", "2022-02-02"])
+    objects["RIC/2022-02.parquet"] = encode_month(
+        february, "RIC/2022-02.parquet", json_data_to_df
+    )[1]
+    save(manifest, "RIC/2022-02.parquet", date(2022, 3, 1))
+    # Listed, but removed since by another worker
+    save(manifest, "RIC/2022-01.parquet", date(2022, 2, 1))
+    downloads = []
+
+    @cache_in_s3(BUCKET, json_data_to_df)
+    def ohlcv__raw(ric, start_date, end_date):
+        downloads.append((ric, start_date))
+        return response(["2022-01-28", "2022-01-31"])
+
+    dfm, error_message = ohlcv__raw("RIC", datetime(2022, 1, 1), datetime(2022, 2, 28))
+    assert error_message is None
+    assert list(dfm.index) == list(
+        pd.to_datetime(["2022-01-28", "2022-01-31", "2022-02-01", "2022-02-02"])
+    )
+    assert downloads == [("RIC", date(2022, 1, 1))]
+    assert sorted(objects) == ["RIC/2022-01.parquet", "RIC/2022-02.parquet"]
+    assert manifest.get("RIC/2022-01.parquet").etag == "etag-2"
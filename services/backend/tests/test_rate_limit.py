@@ -0,0 +1,69 @@
+import pytest
+
+from app.fetchers.common import rate_limit
+from app.fetchers.common.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):  # pylint: disable=redefined-outer-name,unused-argument
+    return RateLimiter("test", str(tmp_path / "rate-limit"), rate=10, burst=2)
+
+
+def rate_of(limiter):  # pylint: disable=redefined-outer-name
+    with limiter.locked_state() as state:
+        return state[2]
+
+
+def test_reserve_queues_callers_beyond_the_burst(limiter):
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1)
+    assert limiter.reserve() == pytest.approx(0.2)
+
+
+def test_reserve_refills_at_the_rate_up_to_the_burst(limiter, clock):
+    for _ in range(3):
+        limiter.reserve()
+    clock[0] += 0.15
+    # 1.5 tokens came back, the bucket holding -0.5 before this call
+    assert limiter.reserve() == pytest.approx(0.05)
+    clock[0] += 60
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1)
+
+
+def test_throttled_halves_the_rate_and_drops_the_burst(limiter):
+    limiter.throttled()
+    assert rate_of(limiter) == pytest.approx(5)
+    # The two tokens left are dropped, and the rate is halved
+    assert limiter.reserve() == pytest.approx(0.2)
+
+
+def test_throttled_keeps_a_minimum_rate(limiter):
+    for _ in range(20):
+        limiter.throttled()
+    assert rate_of(limiter) == pytest.approx(10 * rate_limit.MIN_RATE_FRACTION)
+
+
+def test_succeeded_grows_the_rate_back_up_to_the_quota(limiter):
+    limiter.throttled()
+    limiter.succeeded()
+    assert rate_of(limiter) == pytest.approx(5 + 10 * rate_limit.RATE_STEP_FRACTION)
+    for _ in range(100):
+        limiter.succeeded()
+    assert rate_of(limiter) == pytest.approx(10)
+
+
+def test_state_is_shared_through_the_file(limiter, tmp_path):
+    other = RateLimiter("test", str(tmp_path / "rate-limit"), rate=10, burst=2)
+    limiter.reserve()
+    limiter.reserve()
+    assert other.reserve() == pytest.approx(0.1)
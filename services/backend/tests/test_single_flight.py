@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from app.fetchers.common import single_flight
+
+
+NUMBER_OF_CALLERS = 8
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_LOCK_DIR", str(tmp_path))
+
+
+def run_concurrently(func):
+    """
+    Calls run_once from several threads while the first call is running.
+
+    Returns
+    -------
+        list
+            The result or the exception of every caller.
+    """
+    started = threading.Barrier(NUMBER_OF_CALLERS + 1)
+    outcomes = [None] * NUMBER_OF_CALLERS
+
+    def caller(i):
+        started.wait()
+        try:
+            outcomes[i] = single_flight.run_once(("bucket", "object"), func)
+        except Exception as exception:  # pylint: disable=broad-except
+            outcomes[i] = exception
+
+    threads = [
+        threading.Thread(target=caller, args=(i,)) for i in range(NUMBER_OF_CALLERS)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_run_once_shares_a_single_call():
+    calls = []
+
+    def func(waited):
+        calls.append(waited)
+        time.sleep(0.2)
+        return "month", None
+
+    outcomes = run_concurrently(func)
+    assert calls == [False]
+    assert outcomes == [("month", None)] * NUMBER_OF_CALLERS
+    assert single_flight.flights == {}
+
+
+def test_run_once_raises_the_exception_to_every_caller():
+    calls = []
+
+    def func(waited):
+        calls.append(waited)
+        time.sleep(0.2)
+        raise ValueError("upstream failed")
+
+    outcomes = run_concurrently(func)
+    assert len(calls) == 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert all(str(outcome) == "upstream failed" for outcome in outcomes)
+    assert single_flight.flights == {}
+
+
+def test_run_once_calls_again_once_done():
+    calls = []
+
+    def func(waited):
+        calls.append(waited)
+        return len(calls)
+
+    assert single_flight.run_once("key", func) == 1
+    assert single_flight.run_once("key", func) == 2
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from app.fetchers.common.storage import (
+    frame_to_parquet,
+    json_name,
+    parquet_name,
+    parquet_to_frame,
+)
+
+
+def test_names_of_both_formats():
+    for object_name in ["RIC/2022-01.json", "RIC/2022-01.parquet", "RIC/2022-01"]:
+        assert parquet_name(object_name) == "RIC/2022-01.parquet"
+        assert json_name(object_name) == "RIC/2022-01.json"
+
+
+def test_parquet_round_trip():
+    dfm = pd.DataFrame(
+        {"CLOSE": [1.0, 2.0]}, index=pd.to_datetime(["2022-01-03", "2022-01-04"])
+    )
+    pd.testing.assert_frame_equal(parquet_to_frame(frame_to_parquet(dfm)), dfm)
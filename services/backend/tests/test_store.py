@@ -0,0 +1,53 @@
+from collections import namedtuple
+import io
+
+import pandas as pd
+
+from app.fetchers.factors import store
+
+
+Stat = namedtuple("Stat", ["etag"])
+
+
+def parquet(wide):
+    buffer = io.BytesIO()
+    wide.reset_index().to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_load_store_reuses_the_unchanged_frame(monkeypatch):
+    wide = pd.DataFrame(
+        {"CL": [1.0, 2.0]},
+        index=pd.Index(pd.to_datetime(["2022-02-01", "2022-02-02"]), name="Date"),
+    )
+    calls = []
+
+    def stat_object_if_exists(*_):
+        calls.append("stat")
+        return Stat("v1")
+
+    def get_object(*_):
+        calls.append("get")
+        return parquet(wide)
+
+    monkeypatch.setattr(store, "stat_object_if_exists", stat_object_if_exists)
+    monkeypatch.setattr(store, "get_object", get_object)
+    monkeypatch.setattr(store, "stores", {})
+    pd.testing.assert_frame_equal(store.load_store("carry/bond"), wide)
+    pd.testing.assert_frame_equal(store.load_store("carry/bond"), wide)
+    assert calls == ["stat", "get", "stat"]
+
+
+def test_load_store_of_a_missing_store(monkeypatch):
+    monkeypatch.setattr(store, "stat_object_if_exists", lambda *_: None)
+    assert store.load_store("carry/bond") is None
+
+
+def test_refresh_store_once_skips_a_store_being_refreshed(monkeypatch):
+    monkeypatch.setattr(store, "refreshing", set())
+    monkeypatch.setattr(store, "refresh_store", lambda name: {})
+    assert store.start_refreshing("carry/bond")
+    assert store.refresh_store_once("carry/bond") is None
+    store.stop_refreshing("carry/bond")
+    assert store.refresh_store_once("carry/bond") == {}
+    assert store.refreshing == set()